@@ -1,50 +1,37 @@
 
 import re
-import random
 import asyncio
-import pandas as pd
 from playwright.async_api import async_playwright
 
+from config import CRAWL_DEPTH
+from crawl_pool import scrape_products
+from delta_crawl import DeltaStore, snapshot_path
+from frontier import Frontier, frontier_path
+from metrics import METRICS, metrics_path, timed_field
+from navigation import PRODUCT_READY_SELECTOR, SEARCH_READY_SELECTOR, perform_request_with_retry
+from output_sink import OutputSink
+from page_setup import PageSetup
+from product_record import record_type
+from serp import collect_product_links
+from serp_cards import write_card_snapshot
 
-async def perform_request_with_retry(page, link):
-    MAX_RETRIES = 5
-    retry_count = 0
-    while retry_count < MAX_RETRIES:
-        try:
-            await page.goto(link, timeout=60000)
-            break
-        except:
-            retry_count += 1
-            if retry_count == MAX_RETRIES:
-                raise Exception("Request timed out")
-            await asyncio.sleep(random.uniform(1, 5))
 
-
-async def extract_product_links(browser, page, num_products=0, num_clicks=0):
+async def extract_page_links(page):
     all_items = await page.query_selector_all(
         '.a-link-normal.s-underline-text.s-underline-link-text.s-link-style.a-text-normal')
     product_links = set()
     for item in all_items:
         link = await item.get_attribute('href')
         full_link = 'https://www.amazon.in' + link
-        product_links.add(full_link)  
-    num_products += len(product_links)
-    print(f"Scraped {num_products} products.")
+        product_links.add(full_link)
+    return product_links
 
 
-    next_button = await page.query_selector(
-        "a.s-pagination-item.s-pagination-next.s-pagination-button.s-pagination-separator")
-    if next_button:
-        num_clicks += 1
-        await next_button.click()
-        await page.wait_for_selector('.a-link-normal.s-underline-text.s-underline-link-text.s-link-style.a-text-normal')
-        product_links.update(
-            await extract_product_links(browser, page, num_products,
-                                        num_clicks))  
-    print(f"Finished scraping {num_products} products after {num_clicks} clicks.")
-    return list(product_links)
+async def extract_product_links(browser, page, setup_page=None, cards=None):
+    return await collect_product_links(browser, page, extract_page_links, setup_page, cards=cards)
 
 
+@timed_field
 async def get_product_name(page):
     try:
         product_name = await (await page.query_selector("#productTitle")).text_content()
@@ -53,6 +40,7 @@ async def get_product_name(page):
     return product_name
 
 
+@timed_field
 async def get_brand(page):
     try:
         brand = await (await page.query_selector("tr:has-text('Brand') td.a-size-base")).inner_text()
@@ -62,6 +50,7 @@ async def get_brand(page):
     return brand
 
 
+@timed_field
 async def get_star_rating(page):
     try:
         star_rating = await (await page.query_selector(".a-icon-row .a-icon-alt")).inner_text()
@@ -71,6 +60,7 @@ async def get_star_rating(page):
     return star_rating
 
 
+@timed_field
 async def get_num_ratings(page):
     try:
         num_ratings_elem = await page.query_selector("#acrCustomerReviewLink #acrCustomerReviewText")
@@ -81,6 +71,7 @@ async def get_num_ratings(page):
     return num_ratings
 
 
+@timed_field
 async def get_original_price(page):
     try:
         original_price = await (await page.query_selector(".a-price.a-text-price")).text_content()
@@ -90,6 +81,7 @@ async def get_original_price(page):
     return original_price
 
 
+@timed_field
 async def get_offer_price(page):
     try:
         offer_price = await (await page.query_selector(".a-price-whole")).text_content()
@@ -98,6 +90,7 @@ async def get_offer_price(page):
     return offer_price
 
 
+@timed_field
 async def get_special_feature(page):
     try:
         special_feature_elem = await page.query_selector("tr:has-text('Special Feature') td.a-size-base")
@@ -108,6 +101,7 @@ async def get_special_feature(page):
     return special_feature
 
 
+@timed_field
 async def get_product_dimensions(page):
     try:
         product_dimensions_element = await page.query_selector("tr:has-text('Product Dimensions') td.a-size-base")
@@ -118,6 +112,7 @@ async def get_product_dimensions(page):
     return product_dimensions
 
 
+@timed_field
 async def get_product_color(page):
     try:
         color = await (await page.query_selector("tr th:has-text('Colour')+ td.a-size-base")).text_content()
@@ -127,6 +122,7 @@ async def get_product_color(page):
     return color.strip()
 
 
+@timed_field
 async def get_capacity(page):
     try:
         capacity = await (await page.query_selector("tr:has-text('Capacity') td.a-size-base")).inner_text()
@@ -136,6 +132,7 @@ async def get_capacity(page):
     return capacity
 
 
+@timed_field
 async def get_material(page):
     try:
         material = await (await page.query_selector("tr th:has-text('Material') + td")).text_content()
@@ -145,6 +142,7 @@ async def get_material(page):
     return material.strip()
 
 
+@timed_field
 async def get_recommended_uses(page):
     try:
         recommended_uses = await (
@@ -155,6 +153,7 @@ async def get_recommended_uses(page):
     return recommended_uses.strip()
 
 
+@timed_field
 async def get_output_wattage(page):
     try:
         output_wattage = await (
@@ -165,6 +164,7 @@ async def get_output_wattage(page):
     return output_wattage
 
 
+@timed_field
 async def get_item_weight(page):
     try:
         item_weight = await (
@@ -176,6 +176,7 @@ async def get_item_weight(page):
 
 
 
+@timed_field
 async def get_control_method(page):
     try:
         control_method = await (
@@ -186,6 +187,7 @@ async def get_control_method(page):
     return control_method
 
 
+@timed_field
 async def get_model_name(page):
     try:
         model_name = await (await page.query_selector("tr:has-text('Model Name') td.a-size-base")).inner_text()
@@ -195,6 +197,7 @@ async def get_model_name(page):
     return model_name.strip()
 
 
+@timed_field
 async def get_nonstick_coating(page):
     try:
         nonstick_coating = await (
@@ -205,6 +208,7 @@ async def get_nonstick_coating(page):
     return nonstick_coating.strip()
 
 
+@timed_field
 async def get_is_dishwasher_safe(page):
     try:
         is_dishwasher_safe = await (
@@ -215,6 +219,7 @@ async def get_is_dishwasher_safe(page):
     return is_dishwasher_safe
 
 
+@timed_field
 async def get_manufacturer(page):
     try:
         manufacturer = await (
@@ -225,6 +230,7 @@ async def get_manufacturer(page):
     return manufacturer.strip()
 
 
+@timed_field
 async def get_country_of_origin(page):
     try:
         country_of_origin = await (await page.query_selector("tr th:has-text('Country of Origin') + td")).inner_html()
@@ -234,6 +240,7 @@ async def get_country_of_origin(page):
     return country_of_origin.strip()
 
 
+@timed_field
 async def get_item_model_number(page):
     try:
         item_model_number = await (
@@ -244,6 +251,7 @@ async def get_item_model_number(page):
     return item_model_number
 
 
+@timed_field
 async def get_wattage(page):
     try:
         wattage = await (await page.querySelector("tr:has-text('Wattage') td.a-size-base")).inner_text()
@@ -253,6 +261,7 @@ async def get_wattage(page):
     return wattage
 
 
+@timed_field
 async def get_asin(page):
     try:
         asin = await (await page.query_selector("tr:has-text('ASIN') td.a-size-base")).inner_text()
@@ -263,6 +272,7 @@ async def get_asin(page):
     return asin
 
 
+@timed_field
 async def get_min_temperature_setting(page):
     try:
         min_temperature = await (
@@ -273,6 +283,7 @@ async def get_min_temperature_setting(page):
     return min_temperature
 
 
+@timed_field
 async def get_best_sellers_rank(page):
     try:
         best_sellers_rank = await (
@@ -282,6 +293,7 @@ async def get_best_sellers_rank(page):
     return best_sellers_rank
 
 
+@timed_field
 async def get_bullet_points(page):
     bullet_points = []
     try:
@@ -294,69 +306,94 @@ async def get_bullet_points(page):
     return bullet_points
 
 
-async def main():
-    async with async_playwright() as pw:
-        browser = await pw.chromium.launch()
-        page = await browser.new_page()
-        await perform_request_with_retry(page, 'https://www.amazon.in/s?k=air+fryer&crid=3EWKFR0AZLVMY&sprefix=air+fryer%2Caps%2C3150&ref=nb_sb_noss_1')
-        product_links = await extract_product_links(browser, page)
-
-        data = []
-        for i, link in enumerate(product_links):
-            await perform_request_with_retry(page, link)
-
-            product_name = await get_product_name(page)
-            brand = await get_brand(page)
-            star_rating = await get_star_rating(page)
-            num_ratings = await get_num_ratings(page)
-            original_price = await get_original_price(page)
-            offer_price = await get_offer_price(page)
-            best_sellers_rank = await get_best_sellers_rank(page)
-            item_model_number = await get_item_model_number(page)
-            output_wattage = await get_output_wattage(page)
-            wattage = await get_wattage(page)
-            country_of_origin = await get_country_of_origin(page)
-            manufacturer = await get_manufacturer(page)
-            is_dishwasher_safe = await get_is_dishwasher_safe(page)
-            nonstick_coating = await get_nonstick_coating(page)
-            model_name = await get_model_name(page)
-            control_method = await get_control_method(page)
-            item_weight = await get_item_weight(page)
-            recommended_uses = await get_recommended_uses(page)
-            material = await get_material(page)
-            capacity = await get_capacity(page)
-            product_color = await get_product_color(page)
-            product_dimensions = await get_product_dimensions(page)
-            special_feature = await get_special_feature(page)
-            asin = await get_asin(page)
-            min_temperature = await get_min_temperature_setting(page)
-            bullet_points = await get_bullet_points(page)
-
-
-            if i % 10 == 0 and i > 0:
-                print(f"Processed {i} links.")
-            if i == len(product_links) - 1:
-                print(f"All information for link {i} has been scraped.")
-
-
-            data.append((link, product_name, brand, star_rating, num_ratings, original_price, offer_price,
+async def scrape_product(page, link):
+    await perform_request_with_retry(page, link, PRODUCT_READY_SELECTOR)
+    product_name = await get_product_name(page)
+    brand = await get_brand(page)
+    star_rating = await get_star_rating(page)
+    num_ratings = await get_num_ratings(page)
+    original_price = await get_original_price(page)
+    offer_price = await get_offer_price(page)
+    best_sellers_rank = await get_best_sellers_rank(page)
+    item_model_number = await get_item_model_number(page)
+    output_wattage = await get_output_wattage(page)
+    wattage = await get_wattage(page)
+    country_of_origin = await get_country_of_origin(page)
+    manufacturer = await get_manufacturer(page)
+    is_dishwasher_safe = await get_is_dishwasher_safe(page)
+    nonstick_coating = await get_nonstick_coating(page)
+    model_name = await get_model_name(page)
+    control_method = await get_control_method(page)
+    item_weight = await get_item_weight(page)
+    recommended_uses = await get_recommended_uses(page)
+    material = await get_material(page)
+    capacity = await get_capacity(page)
+    product_color = await get_product_color(page)
+    product_dimensions = await get_product_dimensions(page)
+    special_feature = await get_special_feature(page)
+    asin = await get_asin(page)
+    min_temperature = await get_min_temperature_setting(page)
+    bullet_points = await get_bullet_points(page)
+
+    return ProductRecord(link, product_name, brand, star_rating, num_ratings, original_price, offer_price,
                          best_sellers_rank, output_wattage, asin, item_model_number, min_temperature, wattage, country_of_origin, manufacturer,
-                        is_dishwasher_safe, nonstick_coating, model_name, control_method, item_weight, recommended_uses,
-                        material, capacity, product_color, product_dimensions, special_feature, bullet_points))
+                         is_dishwasher_safe, nonstick_coating, model_name, control_method, item_weight, recommended_uses,
+                         material, capacity, product_color, product_dimensions, special_feature, bullet_points)
 
 
-        df = pd.DataFrame(data, columns=['Product Link', 'Product Name', 'Brand', 'Star Rating', 'Number of Ratings',
-                                         'Original Price', 'Offer Price', 'Best Sellers Rank', 'output_wattage', 'asin', 'item_model_number', 'min_temperature', 'wattage',
-                                   'country_of_origin', 'manufacturer', 'is_dishwasher_safe', 'nonstick_coating',
-                                   'model_name', 'control_method', 'item_weight', 'recommended_uses', 'material',
-                                   'capacity', 'product_color', 'product_dimensions', 'special_feature', 'bullet_points'])
-        
+SEARCH_URL = 'https://www.amazon.in/s?k=air+fryer&crid=3EWKFR0AZLVMY&sprefix=air+fryer%2Caps%2C3150&ref=nb_sb_noss_1'
+OUTPUT_FILE = 'product_details_new_day_3.csv'
+COLUMNS = ['Product Link', 'Product Name', 'Brand', 'Star Rating', 'Number of Ratings',
+           'Original Price', 'Offer Price', 'Best Sellers Rank', 'output_wattage', 'asin', 'item_model_number', 'min_temperature', 'wattage',
+           'country_of_origin', 'manufacturer', 'is_dishwasher_safe', 'nonstick_coating',
+           'model_name', 'control_method', 'item_weight', 'recommended_uses', 'material',
+           'capacity', 'product_color', 'product_dimensions', 'special_feature', 'bullet_points']
+ProductRecord = record_type(COLUMNS)
 
-        df.to_csv('product_details_new_day_3.csv', index=False)
-        print('CSV file has been written successfully.')
+
+async def main():
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch()
+        # Abort images, fonts, media, ads and trackers, serve pages from the on-disk cache, and open the pages from
+        # a context that records to or replays from a HAR archive when SCRAPER_HAR_MODE is set
+        setup_page = PageSetup(OUTPUT_FILE)
+        context = await setup_page.open_context(browser)
+        page = await context.new_page()
+        await setup_page(page)
+        # Keep the product links and their state in a frontier, so a restarted run skips finished links
+        frontier = Frontier(frontier_path(OUTPUT_FILE))
+
+        async def discover_product_links(cards=None):
+            await perform_request_with_retry(page, SEARCH_URL, SEARCH_READY_SELECTOR)
+            return await extract_product_links(context, page, setup_page=setup_page, cards=cards)
+
+        if CRAWL_DEPTH == "serp":
+            # Card fields straight from the search pages, not a single product page load
+            await write_card_snapshot(discover_product_links, OUTPUT_FILE)
+        else:
+            # In the "delta" depth only new and changed products are scraped, the rest is carried forward
+            delta = DeltaStore(snapshot_path(OUTPUT_FILE), COLUMNS)
+            product_links = await frontier.discover_or_resume(delta.discover(discover_product_links))
+
+            # Every row is appended to the output file as soon as it is scraped
+            with OutputSink(OUTPUT_FILE, COLUMNS, append=frontier.resumed,
+                            on_flush=frontier.mark_done) as sink:
+                delta.carry_forward(sink)
+                # No HTML snapshot parser for this layout: SCRAPER_PARSE_MODE / SCRAPER_FETCH_MODE only get a warning
+                await scrape_products(context, product_links, scrape_product, cache=setup_page.cache,
+                                      setup_page=setup_page, sink=delta.track(sink), frontier=frontier)
+            print(f'{sink.path} has been written successfully.')
+            frontier.print_summary()
+            delta.close()
+        # How many requests and bytes the blocking profile and the page cache saved
+        setup_page.print_summary()
+        # Where the crawl time went, per stage and per field
+        METRICS.print_summary()
+        METRICS.write(metrics_path(OUTPUT_FILE))
+        await setup_page.close_context(browser, context)
         await browser.close()
 
 
 if __name__ == '__main__':
-    asyncio.run(main()
+    asyncio.run(main())
 
@@ -1,36 +1,23 @@
 #Import necessary libraries
 import re
-import random
 import asyncio
 import datetime
-import pandas as pd
 from playwright.async_api import async_playwright
 
-
-async def perform_request_with_retry(page, url):
-    # set maximum retries
-    MAX_RETRIES = 5
-    # initialize retry counter
-    retry_count = 0
-    
-    # loop until maximum retries are reached
-    while retry_count < MAX_RETRIES:
-        try:
-            # try to make request to the URL using the page object and a timeout of 30 seconds
-            await page.goto(url, timeout=30000)
-            # break out of the loop if the request was successful
-            break
-        except:
-            # if an exception occurs, increment the retry counter
-            retry_count += 1
-            # if maximum retries have been reached, raise an exception
-            if retry_count == MAX_RETRIES:
-                raise Exception("Request timed out")
-            # wait for a random amount of time between 1 and 5 seconds before retrying
-            await asyncio.sleep(random.uniform(1, 5))
+from config import CRAWL_DEPTH
+from crawl_pool import scrape_products
+from delta_crawl import DeltaStore, snapshot_path
+from frontier import Frontier, frontier_path
+from metrics import METRICS, metrics_path, timed_field
+from navigation import PRODUCT_READY_SELECTOR, SEARCH_READY_SELECTOR, perform_request_with_retry
+from output_sink import OutputSink
+from page_setup import PageSetup
+from product_record import record_type
+from serp import collect_product_links
+from serp_cards import write_card_snapshot
 
 
-async def get_product_urls(browser, page):
+async def get_page_urls(page):
     # Select all elements with the product urls
     all_items = await page.query_selector_all(
         '.a-link-normal.s-underline-text.s-underline-link-text.s-link-style.a-text-normal')
@@ -61,29 +48,15 @@ async def get_product_urls(browser, page):
             product_urls.add(full_url)
             # Use add instead of append to prevent duplicates
 
-    # Check if there is a next button
-    next_button = await page.query_selector(
-        "a.s-pagination-item.s-pagination-next.s-pagination-button.s-pagination-separator")
-    if next_button:
-        # If there is a next button, click on it
-        is_button_clickable = await next_button.is_enabled()
-        if is_button_clickable:
-            await next_button.click()
-            # Wait for the next page to load
-            await page.wait_for_selector(
-                '.a-link-normal.s-underline-text.s-underline-link-text.s-link-style.a-text-normal')
-            # Recursively call the function to extract links from the next page
-            product_urls.update(
-                await get_product_urls(browser, page))  # Use update instead of += to prevent duplicates
-        else:
-            print("Next button is not clickable")  # Use update instead of += to prevent duplicates
+    return product_urls
 
-    num_products = len(product_urls)
-    print(f"Scraped {num_products} products.")
 
-    return list(product_urls)
+async def get_product_urls(browser, page, setup_page=None, cards=None):
+    # Work out every results page from the pagination strip and fetch them concurrently
+    return await collect_product_links(browser, page, get_page_urls, setup_page, cards=cards)
 
 
+@timed_field
 async def get_product_name(page):
     try:
         # Find the product title element and get its text content
@@ -97,6 +70,7 @@ async def get_product_name(page):
     return product_name.strip()
 
 
+@timed_field
 async def get_brand_name(page):
     try:
         # Find the brand name element and get its text content
@@ -113,10 +87,12 @@ async def get_brand_name(page):
     return brand_name
 
 
+@timed_field
 async def get_star_rating(page):
     try:
         # Find the star rating element and get its text content
-        star_rating_elem = await page.wait_for_selector(".a-icon-alt")
+        # (the page is already parsed, so a missing rating fails at once instead of after a 30s wait)
+        star_rating_elem = await page.query_selector(".a-icon-alt")
         star_rating = await star_rating_elem.inner_text()
         star_rating = star_rating.split(" ")[0]
     except:
@@ -132,12 +108,13 @@ async def get_star_rating(page):
     return star_rating
 
 
+@timed_field
 async def get_num_reviews(page):
     try:
         # Find the number of reviews element and get its text content
         num_reviews_elem = await page.query_selector("#acrCustomerReviewLink #acrCustomerReviewText")
-        num_reviews = await num_ratings_elem.inner_text()
-        num_reviews = num_ratings.split(" ")[0]
+        num_reviews = await num_reviews_elem.inner_text()
+        num_reviews = num_reviews.split(" ")[0]
     except:
         try:
             # If the previous attempt failed, check if there are no reviews for the product
@@ -151,6 +128,7 @@ async def get_num_reviews(page):
     return num_reviews
 
 
+@timed_field
 async def get_MRP(page):
     try:
         # Get MRP element and extract text content
@@ -163,6 +141,7 @@ async def get_MRP(page):
     return MRP
 
 
+@timed_field
 async def get_sale_price(page):
     try:
         # Get sale price element and extract text content
@@ -174,6 +153,7 @@ async def get_sale_price(page):
     return sale_price
 
 
+@timed_field
 async def get_technical_details(page):
     try:
         # Get table containing technical details and its rows
@@ -232,6 +212,7 @@ async def get_technical_details(page):
         return {}, 'Not Available', 'Not Available', 'Not Available', 'Not Available'
 
 
+@timed_field
 async def get_best_sellers_rank(page):
     try:
         # Try to get the Best Sellers Rank element
@@ -259,6 +240,7 @@ async def get_best_sellers_rank(page):
     return home_kitchen_rank, air_fryers_rank
 
 
+@timed_field
 async def get_bullet_points(page):
     bullet_points = []
     try:
@@ -279,57 +261,90 @@ async def get_bullet_points(page):
     return bullet_points
 
 
+async def scrape_product(page, url):
+    await perform_request_with_retry(page, url, PRODUCT_READY_SELECTOR)
+
+    product_name = await get_product_name(page)
+    brand = await get_brand_name(page)
+    star_rating = await get_star_rating(page)
+    num_reviews = await get_num_reviews(page)
+    MRP = await get_MRP(page)
+    sale_price = await get_sale_price(page)
+    home_kitchen_rank, air_fryers_rank = await get_best_sellers_rank(page)
+    technical_details, colour, capacity, wattage, country_of_origin = await get_technical_details(page)
+    bullet_points = await get_bullet_points(page)
+
+    # Add the corresponding date
+    today = datetime.datetime.now().strftime("%Y-%m-%d")
+    # Return the scraped information as one row
+    return ProductRecord(
+        today, url, product_name, brand, star_rating, num_reviews, MRP, sale_price, colour,
+        capacity, wattage, country_of_origin,
+        home_kitchen_rank, air_fryers_rank, technical_details, bullet_points)
+
+
+def snapshot_row(url, fields):
+    # The same row as scrape_product, from the fields offline_parser.parse_product_html read out of the page's HTML
+    today = datetime.datetime.now().strftime("%Y-%m-%d")
+    return ProductRecord(today, url, *fields)
+
+
+BROWSER_TYPE = 'firefox'
+SEARCH_URL = 'https://www.amazon.in/s?k=airfry&i=kitchen&crid=ADZU989EVDIH&sprefix=airfr%2Ckitchen%2C4752&ref=nb_sb_ss_ts-doa-p_3_5'
+OUTPUT_FILE = 'product_data.csv'
+COLUMNS = ['date', 'product_url', 'product_name', 'brand', 'star_rating', 'number_of_reviews',
+           'MRP', 'sale_price', 'colour', 'capacity', 'wattage',
+           'country_of_origin', 'home_kitchen_rank', 'air_fryers_rank', 'technical_details',
+           'description']
+ProductRecord = record_type(COLUMNS)
+
+
 async def main():
     # Launch a Firefox browser using Playwright
     async with async_playwright() as pw:
-        browser = await pw.firefox.launch()
-        page = await browser.new_page()
-
-        # Make a request to the Amazon search page and extract the product URLs
-        await perform_request_with_retry(page,
-                                         'https://www.amazon.in/s?k=airfry&i=kitchen&crid=ADZU989EVDIH&sprefix=airfr%2Ckitchen%2C4752&ref=nb_sb_ss_ts-doa-p_3_5')
-        product_urls = await get_product_urls(browser, page)
-        data = []
-
-        # Loop through each product URL and scrape the necessary information
-        for i, url in enumerate(product_urls):
-            await perform_request_with_retry(page, url)
-
-            product_name = await get_product_name(page)
-            brand = await get_brand_name(page)
-            star_rating = await get_star_rating(page)
-            num_reviews = await get_num_reviews(page)
-            MRP = await get_MRP(page)
-            sale_price = await get_sale_price(page)
-            home_kitchen_rank, air_fryers_rank = await get_best_sellers_rank(page)
-            technical_details, colour, capacity, wattage, country_of_origin = await get_technical_details(page)
-            bullet_points = await get_bullet_points(page)
-
-            # Print progress message after processing every 10 product URLs
-            if i % 10 == 0 and i > 0:
-                print(f"Processed {i} links.")
-
-            # Print completion message after all product URLs have been processed
-            if i == len(product_urls) - 1:
-                print(f"All information for url {i} has been scraped.")
-
-            # Add the corresponding date
-            today = datetime.datetime.now().strftime("%Y-%m-%d")
-            # Add the scraped information to a list
-            data.append((
-                today, url, product_name, brand, star_rating, num_reviews, MRP, sale_price, colour,
-                capacity, wattage, country_of_origin,
-                home_kitchen_rank, air_fryers_rank, technical_details, bullet_points))
-
-        # Convert the list of tuples to a Pandas DataFrame and save it to a CSV file
-        df = pd.DataFrame(data,
-                          columns=['date', 'product_url', 'product_name', 'brand', 'star_rating', 'number_of_reviews',
-                                   'MRP', 'sale_price', 'colour', 'capacity', 'wattage',
-                                   'country_of_origin', 'home_kitchen_rank', 'air_fryers_rank', 'technical_details',
-                                   'description'])
-        df.to_csv('product_data.csv', index=False)
-        print('CSV file has been written successfully.')
-
+        browser = await getattr(pw, BROWSER_TYPE).launch()
+        # Abort images, fonts, media, ads and trackers, serve pages from the on-disk cache, and open the pages from
+        # a context that records to or replays from a HAR archive when SCRAPER_HAR_MODE is set
+        setup_page = PageSetup(OUTPUT_FILE)
+        context = await setup_page.open_context(browser)
+        page = await context.new_page()
+        await setup_page(page)
+
+        # Keep the product links and their state in a frontier, so a restarted run skips finished links
+        frontier = Frontier(frontier_path(OUTPUT_FILE))
+
+        async def discover_product_links(cards=None):
+            # Make a request to the Amazon search page and extract the product URLs
+            await perform_request_with_retry(page, SEARCH_URL, SEARCH_READY_SELECTOR)
+            return await get_product_urls(context, page, setup_page=setup_page, cards=cards)
+
+        if CRAWL_DEPTH == "serp":
+            # Card fields straight from the search pages, not a single product page load
+            await write_card_snapshot(discover_product_links, OUTPUT_FILE)
+        else:
+            # In the "delta" depth only new and changed products are scraped, the rest is carried forward
+            delta = DeltaStore(snapshot_path(OUTPUT_FILE), COLUMNS)
+            product_urls = await frontier.discover_or_resume(delta.discover(discover_product_links))
+
+            # Append every row to the output file as soon as it is scraped, so a crash keeps the rows done so far
+            with OutputSink(OUTPUT_FILE, COLUMNS, append=frontier.resumed,
+                            on_flush=frontier.mark_done) as sink:
+                delta.carry_forward(sink)
+                # Live getters, or HTML snapshots parsed in worker processes (SCRAPER_PARSE_MODE=snapshot) and fetched
+                # over HTTP/2 (SCRAPER_FETCH_MODE=http)
+                await scrape_products(context, product_urls, scrape_product, snapshot_row, cache=setup_page.cache,
+                                      setup_page=setup_page, sink=delta.track(sink), frontier=frontier)
+            print(f'{sink.path} has been written successfully.')
+            frontier.print_summary()
+            delta.close()
+
+        # How many requests and bytes the blocking profile and the page cache saved
+        setup_page.print_summary()
+        # Where the crawl time went, per stage and per field
+        METRICS.print_summary()
+        METRICS.write(metrics_path(OUTPUT_FILE))
+
+        await setup_page.close_context(browser, context)
         # Close the browser
         await browser.close()
 
@@ -1,49 +1,40 @@
 import re
-import random
 import asyncio
 import datetime
-import pandas as pd
 from playwright.async_api import async_playwright
 
-
-async def perform_request_with_retry(page, link):
-    MAX_RETRIES = 5
-    retry_count = 0
-    while retry_count < MAX_RETRIES:
-        try:
-            await page.goto(link, timeout=60000)
-            break
-        except:
-            retry_count += 1
-            if retry_count == MAX_RETRIES:
-                raise Exception("Request timed out")
-            await asyncio.sleep(random.uniform(1, 5))
-
-
-async def extract_product_links(browser, page, num_products=0, num_clicks=0):
+from config import CRAWL_DEPTH
+from crawl_pool import scrape_products
+from delta_crawl import DeltaStore, snapshot_path
+from frontier import Frontier, frontier_path
+from metrics import METRICS, metrics_path, timed_field
+from navigation import PRODUCT_READY_SELECTOR, SEARCH_READY_SELECTOR, perform_request_with_retry
+from output_sink import OutputSink
+from page_setup import PageSetup
+from product_record import record_type
+from serp import collect_product_links
+from serp_cards import write_card_snapshot
+
+
+async def extract_page_links(page):
+    # Select all elements with the product links
     all_items = await page.query_selector_all(
         '.a-link-normal.s-underline-text.s-underline-link-text.s-link-style.a-text-normal')
     product_links = set()
+    # Loop through each item and extract the href attribute
     for item in all_items:
         link = await item.get_attribute('href')
         full_link = 'https://www.amazon.in' + link
-        product_links.add(full_link)  
-    num_products += len(product_links)
-    print(f"Scraped {num_products} products.")
-
-    next_button = await page.query_selector(
-        "a.s-pagination-item.s-pagination-next.s-pagination-button.s-pagination-separator")
-    if next_button:
-        num_clicks += 1
-        await next_button.click()
-        await page.wait_for_selector('.a-link-normal.s-underline-text.s-underline-link-text.s-link-style.a-text-normal')
-        product_links.update(
-            await extract_product_links(browser, page, num_products,
-                                        num_clicks)) 
-    print(f"Finished scraping {num_products} products after {num_clicks} clicks.")
-    return list(product_links)
+        product_links.add(full_link)  # Use add instead of append to prevent duplicates
+    return product_links
 
 
+async def extract_product_links(browser, page, setup_page=None, cards=None):
+    # Work out every results page from the pagination strip and fetch them concurrently
+    return await collect_product_links(browser, page, extract_page_links, setup_page, cards=cards)
+
+
+@timed_field
 async def get_product_name(page):
     try:
         product_name = await (await page.query_selector("#productTitle")).text_content()
@@ -52,6 +43,7 @@ async def get_product_name(page):
     return product_name
 
 
+@timed_field
 async def get_brand(page):
     try:
         brand = await (await page.query_selector("tr:has-text('Brand') td.a-size-base")).inner_text()
@@ -61,6 +53,7 @@ async def get_brand(page):
     return brand
 
 
+@timed_field
 async def get_star_rating(page):
     try:
         star_rating = await (await page.query_selector(".a-icon-row .a-icon-alt")).inner_text()
@@ -70,6 +63,7 @@ async def get_star_rating(page):
     return star_rating
 
 
+@timed_field
 async def get_num_ratings(page):
     try:
         num_ratings_elem = await page.query_selector("#acrCustomerReviewLink #acrCustomerReviewText")
@@ -80,6 +74,7 @@ async def get_num_ratings(page):
     return num_ratings
 
 
+@timed_field
 async def get_original_price(page):
     try:
         original_price = await (await page.query_selector(".a-price.a-text-price")).text_content()
@@ -89,6 +84,7 @@ async def get_original_price(page):
     return original_price
 
 
+@timed_field
 async def get_offer_price(page):
     try:
         offer_price = await (await page.query_selector(".a-price-whole")).text_content()
@@ -97,6 +93,7 @@ async def get_offer_price(page):
     return offer_price
 
 
+@timed_field
 async def extract_technical_details(page):
     try:
         table_element = await page.query_selector("#productDetails_techSpec_section_1")
@@ -114,6 +111,7 @@ async def extract_technical_details(page):
         return {}
 
 
+@timed_field
 async def get_best_sellers_rank(page):
     try:
         best_sellers_rank = await (
@@ -123,6 +121,7 @@ async def get_best_sellers_rank(page):
     return best_sellers_rank
 
 
+@timed_field
 async def get_bullet_points(page):
     bullet_points = []
     try:
@@ -135,44 +134,72 @@ async def get_bullet_points(page):
     return bullet_points
 
 
+async def scrape_product(page, link):
+    await perform_request_with_retry(page, link, PRODUCT_READY_SELECTOR)
+
+    product_name = await get_product_name(page)
+    brand = await get_brand(page)
+    star_rating = await get_star_rating(page)
+    num_ratings = await get_num_ratings(page)
+    original_price = await get_original_price(page)
+    offer_price = await get_offer_price(page)
+    best_sellers_rank = await get_best_sellers_rank(page)
+    technical_details = await extract_technical_details(page)
+    bullet_points = await get_bullet_points(page)
+
+    today = datetime.datetime.now().strftime("%Y-%m-%d")
+    return ProductRecord(today, link, product_name, brand, star_rating, num_ratings, original_price, offer_price,
+                         best_sellers_rank, technical_details, bullet_points)
+
+
+SEARCH_URL = 'https://www.amazon.in/s?k=air+fryer&crid=3EWKFR0AZLVMY&sprefix=air+fryer%2Caps%2C3150&ref=nb_sb_noss_1'
+OUTPUT_FILE = 'product_details_new_day_4.1.csv'
+COLUMNS = ['Date', 'Product Link', 'Product Name', 'Brand', 'Star Rating', 'Number of Ratings',
+           'Original Price', 'Offer Price', 'Best Sellers Rank', 'Technical Details',
+           'Description']
+ProductRecord = record_type(COLUMNS)
+
+
 async def main():
     async with async_playwright() as pw:
         browser = await pw.chromium.launch()
-        page = await browser.new_page()
-        await perform_request_with_retry(page,
-                                         'https://www.amazon.in/s?k=air+fryer&crid=3EWKFR0AZLVMY&sprefix=air+fryer%2Caps%2C3150&ref=nb_sb_noss_1')
-        product_links = await extract_product_links(browser, page)
-
-        data = []
-        for i, link in enumerate(product_links):
-            await perform_request_with_retry(page, link)
-
-            product_name = await get_product_name(page)
-            brand = await get_brand(page)
-            star_rating = await get_star_rating(page)
-            num_ratings = await get_num_ratings(page)
-            original_price = await get_original_price(page)
-            offer_price = await get_offer_price(page)
-            best_sellers_rank = await get_best_sellers_rank(page)
-            technical_details = await extract_technical_details(page)
-            bullet_points = await get_bullet_points(page)
-
-            if i % 10 == 0 and i > 0:
-                print(f"Processed {i} links.")
-            if i == len(product_links) - 1:
-                print(f"All information for link {i} has been scraped.")
-
-            today = datetime.datetime.now().strftime("%Y-%m-%d")
-            data.append((today, link, product_name, brand, star_rating, num_ratings, original_price, offer_price,
-                         best_sellers_rank, technical_details, bullet_points))
-
-        df = pd.DataFrame(data,
-                          columns=['Date', 'Product Link', 'Product Name', 'Brand', 'Star Rating', 'Number of Ratings',
-                                   'Original Price', 'Offer Price', 'Best Sellers Rank', 'Technical Details',
-                                   'Description'])
-
-        df.to_csv('product_details_new_day_4.1.csv', index=False)
-        print('CSV file has been written successfully.')
+        # Abort images, fonts, media, ads and trackers, serve pages from the on-disk cache, and open the pages from
+        # a context that records to or replays from a HAR archive when SCRAPER_HAR_MODE is set
+        setup_page = PageSetup(OUTPUT_FILE)
+        context = await setup_page.open_context(browser)
+        page = await context.new_page()
+        await setup_page(page)
+        # Keep the product links and their state in a frontier, so a restarted run skips finished links
+        frontier = Frontier(frontier_path(OUTPUT_FILE))
+
+        async def discover_product_links(cards=None):
+            await perform_request_with_retry(page, SEARCH_URL, SEARCH_READY_SELECTOR)
+            return await extract_product_links(context, page, setup_page=setup_page, cards=cards)
+
+        if CRAWL_DEPTH == "serp":
+            # Card fields straight from the search pages, not a single product page load
+            await write_card_snapshot(discover_product_links, OUTPUT_FILE)
+        else:
+            # In the "delta" depth only new and changed products are scraped, the rest is carried forward
+            delta = DeltaStore(snapshot_path(OUTPUT_FILE), COLUMNS)
+            product_links = await frontier.discover_or_resume(delta.discover(discover_product_links))
+
+            # Every row is appended to the output file as soon as it is scraped
+            with OutputSink(OUTPUT_FILE, COLUMNS, append=frontier.resumed,
+                            on_flush=frontier.mark_done) as sink:
+                delta.carry_forward(sink)
+                # No HTML snapshot parser for this layout: SCRAPER_PARSE_MODE / SCRAPER_FETCH_MODE only get a warning
+                await scrape_products(context, product_links, scrape_product, cache=setup_page.cache,
+                                      setup_page=setup_page, sink=delta.track(sink), frontier=frontier)
+            print(f'{sink.path} has been written successfully.')
+            frontier.print_summary()
+            delta.close()
+        # How many requests and bytes the blocking profile and the page cache saved
+        setup_page.print_summary()
+        # Where the crawl time went, per stage and per field
+        METRICS.print_summary()
+        METRICS.write(metrics_path(OUTPUT_FILE))
+        await setup_page.close_context(browser, context)
         await browser.close()
 
 
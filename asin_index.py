@@ -0,0 +1,149 @@
+import os
+import re
+import math
+import time
+import sqlite3
+import hashlib
+from urllib.parse import unquote, urlsplit
+
+from config import BLOOM_CAPACITY, BLOOM_ERROR_RATE, FRESHNESS_HOURS, SEEN_INDEX
+
+# Product paths Amazon links to: /<slug>/dp/<ASIN>/ref=..., /gp/product/<ASIN>, /gp/aw/d/<ASIN> (mobile), and the
+# same inside the url= parameter of sponsored /sspa/click links once it is unquoted
+ASIN_PATTERN = re.compile(r"/(?:dp|gp/product|gp/aw/d)/([A-Z0-9]{10})(?=[/?&#]|$)")
+
+
+def extract_asin(url):
+    match = ASIN_PATTERN.search(unquote(url))
+    return match.group(1) if match else None
+
+
+def canonical_product_url(url):
+    # https://www.amazon.in/dp/<ASIN> for every link to the same product; links without an ASIN are kept as they are
+    asin = extract_asin(url)
+    if asin is None:
+        return url
+    host = urlsplit(url).netloc.lower() or "www.amazon.in"
+    return f"https://{host}/dp/{asin}"
+
+
+def seen_path(frontier_path):
+    # product_data.frontier.sqlite -> product_data.seen.sqlite (or product_data.seen.bloom/)
+    base = frontier_path[:-len(".frontier.sqlite")] if frontier_path.endswith(".frontier.sqlite") else frontier_path
+    return base + (".seen.bloom" if SEEN_INDEX == "bloom" else ".seen.sqlite")
+
+
+class SqliteSeenIndex:
+    # When every ASIN was last scraped, kept across runs
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS seen (asin TEXT PRIMARY KEY, fetched_at REAL NOT NULL)")
+        self.db.commit()
+
+    def mark(self, urls):
+        now = time.time()
+        rows = [(asin, now) for asin in map(extract_asin, urls) if asin]
+        self.db.executemany("INSERT INTO seen (asin, fetched_at) VALUES (?, ?) "
+                            "ON CONFLICT(asin) DO UPDATE SET fetched_at = excluded.fetched_at", rows)
+        self.db.commit()
+
+    def fresh(self, urls, window_seconds):
+        # The subset of urls whose product was scraped less than window_seconds ago
+        since = time.time() - window_seconds
+        fresh = set()
+        for url in urls:
+            asin = extract_asin(url)
+            if asin and self.db.execute("SELECT 1 FROM seen WHERE asin = ? AND fetched_at >= ?",
+                                        (asin, since)).fetchone():
+                fresh.add(url)
+        return fresh
+
+    def close(self):
+        self.db.close()
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate, bits=None):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.size + 7) // 8)
+
+    def positions(self, key):
+        # Double hashing: k positions from the two halves of one blake2b digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+
+class BloomSeenIndex:
+    # Fixed-size index for very large crawls: a Bloom filter per half freshness window on disk. An ASIN counts as
+    # fresh when the current or the previous filter has it, i.e. it was scraped between half a window and a whole
+    # window ago or later. A false positive (BLOOM_ERROR_RATE) skips a product until its filters rotate out.
+    def __init__(self, directory, window_seconds=FRESHNESS_HOURS * 3600, capacity=BLOOM_CAPACITY,
+                 error_rate=BLOOM_ERROR_RATE):
+        self.directory = directory
+        self.period = max(1, window_seconds / 2)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.filters = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def generation(self):
+        return int(time.time() // self.period)
+
+    def filter_path(self, generation):
+        return os.path.join(self.directory, f"{generation}.bloom")
+
+    def load(self, generation):
+        if generation not in self.filters:
+            path = self.filter_path(generation)
+            bits = None
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    bits = bytearray(f.read())
+            self.filters[generation] = BloomFilter(self.capacity, self.error_rate, bits)
+        return self.filters[generation]
+
+    def mark(self, urls):
+        generation = self.generation()
+        bloom = self.load(generation)
+        for asin in map(extract_asin, urls):
+            if asin:
+                bloom.add(asin)
+        path = self.filter_path(generation)
+        with open(path + ".tmp", "wb") as f:
+            f.write(bloom.bits)
+        os.replace(path + ".tmp", path)
+        # Filters older than the window are never read again
+        for name in os.listdir(self.directory):
+            if name.endswith(".bloom") and int(name.split(".")[0]) < generation - 1:
+                os.remove(os.path.join(self.directory, name))
+
+    def fresh(self, urls, window_seconds):
+        # The filters of every half window that window_seconds reaches back into (current and previous for the
+        # window the index was opened with), as far as they are still on disk
+        generation = self.generation()
+        oldest = generation - max(1, math.ceil(window_seconds / self.period)) + 1
+        filters = [self.load(older) for older in range(oldest, generation + 1)
+                   if older in self.filters or os.path.exists(self.filter_path(older))]
+        return {url for url in urls if (asin := extract_asin(url)) and any(asin in bloom for bloom in filters)}
+
+    def close(self):
+        pass
+
+
+def open_seen_index(path, freshness_hours=FRESHNESS_HOURS):
+    # No index at all when nothing is ever skipped as fresh (FRESHNESS_HOURS = 0, always the case in delta crawls)
+    if not SEEN_INDEX or not freshness_hours or path.startswith(":memory:"):
+        return None
+    if SEEN_INDEX == "bloom":
+        return BloomSeenIndex(path, window_seconds=freshness_hours * 3600)
+    return SqliteSeenIndex(path)
@@ -0,0 +1,50 @@
+import sys
+import glob
+import time
+import asyncio
+from playwright.async_api import async_playwright
+
+from extraction_plan import AIR_FRYER_FIELDS, extract_fields
+from legacy_getters import GETTERS
+
+
+async def time_it(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await func()
+    return (time.perf_counter() - start) / repeat
+
+
+async def main(pages_dir='fixtures', repeat=20):
+    paths = sorted(glob.glob(f'{pages_dir}/product_*.html'))
+
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch()
+        page = await browser.new_page()
+
+        total_legacy = total_plan = 0
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                await page.set_content(f.read())
+
+            async def run_getters():
+                return [await getter(page) for getter in GETTERS]
+
+            async def run_plan():
+                return await extract_fields(page, AIR_FRYER_FIELDS)
+
+            legacy_seconds = await time_it(run_getters, repeat)
+            plan_seconds = await time_it(run_plan, repeat)
+            total_legacy += legacy_seconds
+            total_plan += plan_seconds
+            print(f"{path}: getters {legacy_seconds * 1000:.1f} ms, single evaluate {plan_seconds * 1000:.1f} ms "
+                  f"({legacy_seconds / plan_seconds:.1f}x)")
+
+        if paths:
+            print(f"Average over {len(paths)} pages: getters {total_legacy / len(paths) * 1000:.1f} ms, "
+                  f"single evaluate {total_plan / len(paths) * 1000:.1f} ms ({total_legacy / total_plan:.1f}x)")
+        await browser.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(*sys.argv[1:2]))
@@ -0,0 +1,246 @@
+import io
+import os
+import re
+import sys
+import json
+import time
+import glob
+import asyncio
+import argparse
+import datetime
+import platform
+import functools
+import statistics
+import subprocess
+import threading
+import contextlib
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import psutil
+from playwright.async_api import async_playwright
+
+from crawl_pool import crawl_products
+from navigation import PRODUCT_READY_SELECTOR, perform_request_with_retry
+from rate_limiter import RATE_LIMITER
+from resource_blocking import ResourceBlocker
+from script_loader import load_script
+
+SCRAPER_SCRIPT = 'Playwright- Air fryer data- scraping code.py'
+FIELD_GETTERS = ['get_product_name', 'get_brand_name', 'get_star_rating', 'get_num_reviews', 'get_MRP',
+                 'get_sale_price', 'get_best_sellers_rank', 'get_technical_details', 'get_bullet_points']
+SEARCH_FIXTURE = 'search_air_fryer.html'
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    # Serves the fixtures under amazon.in-like paths:
+    #   /s?...                 -> the search results fixture (every page number gets the same page)
+    #   .../dp/<ASIN>/...      -> product_<ASIN>.html, or one of the product fixtures for ASINs without one
+    def translate_path(self, path):
+        path = path.split('?')[0]
+        if path == '/s':
+            return os.path.join(self.directory, SEARCH_FIXTURE)
+        match = re.search(r'/dp/([A-Z0-9]{10})', path)
+        if match:
+            product = os.path.join(self.directory, f'product_{match.group(1)}.html')
+            if os.path.exists(product):
+                return product
+            products = sorted(glob.glob(os.path.join(self.directory, 'product_*.html')))
+            return products[sum(map(ord, match.group(1))) % len(products)]
+        return super().translate_path(path)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fixtures(directory):
+    # Local HTTP server in a background thread, so page.goto goes through a real network stack
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(FixtureHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class RssSampler:
+    # Peak resident memory of this Python process and of everything it started (Playwright driver and browser)
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak_python = self.peak_browser = 0
+        self.stage_python = self.stage_browser = 0
+
+    def sample(self):
+        python = self.process.memory_info().rss
+        browser = 0
+        for child in self.process.children(recursive=True):
+            try:
+                browser += child.memory_info().rss
+            except psutil.Error:
+                pass
+        self.peak_python = max(self.peak_python, python)
+        self.peak_browser = max(self.peak_browser, browser)
+        self.stage_python = max(self.stage_python, python)
+        self.stage_browser = max(self.stage_browser, browser)
+
+    def start_stage(self):
+        self.stage_python = self.stage_browser = 0
+        self.sample()
+
+    def stage_peaks(self):
+        self.sample()
+        return {'peak_rss_python_mb': round(self.stage_python / 1_000_000, 1),
+                'peak_rss_browser_mb': round(self.stage_browser / 1_000_000, 1)}
+
+    async def run(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+
+def summarize(seconds):
+    # Latency distribution of a list of timings, in milliseconds
+    ms = sorted(s * 1000 for s in seconds)
+    summary = {'n': len(ms), 'mean_ms': statistics.fmean(ms), 'p50_ms': statistics.median(ms),
+               'min_ms': ms[0], 'max_ms': ms[-1]}
+    if len(ms) > 1:
+        summary['p95_ms'] = statistics.quantiles(ms, n=20, method='inclusive')[18]
+    return {key: round(value, 3) if isinstance(value, float) else value for key, value in summary.items()}
+
+
+async def timed(func):
+    start = time.perf_counter()
+    await func()
+    return time.perf_counter() - start
+
+
+async def bench_fields(page, scraper, product_urls, repeat):
+    # Every get_* function on its own, against each product fixture already loaded in the page
+    samples = {name: [] for name in FIELD_GETTERS}
+    for url in product_urls:
+        await perform_request_with_retry(page, url, PRODUCT_READY_SELECTOR)
+        for name in FIELD_GETTERS:
+            getter = getattr(scraper, name)
+            for _ in range(repeat):
+                samples[name].append(await timed(lambda: getter(page)))
+    return {name: summarize(seconds) for name, seconds in samples.items()}
+
+
+async def bench_navigation(page, product_urls, repeat):
+    # page.goto up to the readiness anchor, which is what every product costs before any field is read
+    samples = []
+    for _ in range(repeat):
+        for url in product_urls:
+            samples.append(await timed(lambda: perform_request_with_retry(page, url, PRODUCT_READY_SELECTOR)))
+    return summarize(samples)
+
+
+async def bench_pagination(browser, page, scraper, search_url, repeat):
+    # Search page discovery: first page, pagination strip, then the remaining pages concurrently
+    samples = []
+    links = []
+    for _ in range(repeat):
+        await page.goto(search_url)
+
+        async def discover():
+            links[:] = await scraper.get_product_urls(browser, page)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            samples.append(await timed(discover))
+    return {**summarize(samples), 'links': len(links)}
+
+
+async def bench_throughput(browser, scraper, product_urls, concurrency, num_pages, sampler):
+    # Full scrape_product (navigation and every getter) over num_pages links with `concurrency` pages
+    links = [f'{product_urls[i % len(product_urls)]}?n={i}' for i in range(num_pages)]
+    blocker = ResourceBlocker()
+    sampler.start_stage()
+    start = time.perf_counter()
+    await crawl_products(browser, links, scraper.scrape_product, concurrency=concurrency,
+                         setup_page=blocker.install, report_progress=False)
+    seconds = time.perf_counter() - start
+    return {'concurrency': concurrency, 'pages': num_pages, 'seconds': round(seconds, 3),
+            'pages_per_second': round(num_pages / seconds, 2), **sampler.stage_peaks()}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_suite(args):
+    # The fixtures are served locally, the amazon.in rate limit would only measure itself
+    RATE_LIMITER.enabled = False
+    scraper = load_script(SCRAPER_SCRIPT, 'scraper')
+    server = serve_fixtures(os.path.abspath(args.fixtures))
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    product_urls = [f'{base_url}/dp/{os.path.basename(path)[len("product_"):-len(".html")]}'
+                    for path in sorted(glob.glob(os.path.join(args.fixtures, 'product_*.html')))]
+    search_url = f'{base_url}/s?k=air+fryer'
+
+    sampler = RssSampler()
+    sampling = asyncio.create_task(sampler.run())
+    results = {}
+    try:
+        async with async_playwright() as pw:
+            browser = await pw.chromium.launch()
+            page = await browser.new_page()
+
+            print("Timing the field getters...")
+            results['fields'] = await bench_fields(page, scraper, product_urls, args.repeat)
+            print("Timing product page navigation...")
+            results['navigation'] = await bench_navigation(page, product_urls, args.repeat)
+            print("Timing search page discovery...")
+            results['pagination'] = await bench_pagination(browser, page, scraper, search_url, args.repeat)
+            await page.close()
+
+            results['throughput'] = []
+            for concurrency in args.concurrency:
+                print(f"Crawling {args.pages} pages with concurrency {concurrency}...")
+                results['throughput'].append(
+                    await bench_throughput(browser, scraper, product_urls, concurrency, args.pages, sampler))
+            await browser.close()
+    finally:
+        sampling.cancel()
+        server.shutdown()
+
+    results['peak_rss_python_mb'] = round(sampler.peak_python / 1_000_000, 1)
+    results['peak_rss_browser_mb'] = round(sampler.peak_browser / 1_000_000, 1)
+    return results
+
+
+def print_report(results):
+    for name, summary in results['fields'].items():
+        print(f"{name:<24} p50 {summary['p50_ms']:8.2f} ms  p95 {summary.get('p95_ms', summary['max_ms']):8.2f} ms")
+    navigation = results['navigation']
+    print(f"{'navigation':<24} p50 {navigation['p50_ms']:8.2f} ms  p95 {navigation.get('p95_ms', navigation['max_ms']):8.2f} ms")
+    pagination = results['pagination']
+    print(f"{'search discovery':<24} p50 {pagination['p50_ms']:8.2f} ms  ({pagination['links']} links)")
+    for run in results['throughput']:
+        print(f"concurrency {run['concurrency']:<3} {run['pages_per_second']:8.2f} pages/s  "
+              f"peak RSS python {run['peak_rss_python_mb']} MB, browser {run['peak_rss_browser_mb']} MB")
+    print(f"Peak RSS: python {results['peak_rss_python_mb']} MB, browser {results['peak_rss_browser_mb']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against locally served fixture pages.")
+    parser.add_argument('--fixtures', default='fixtures')
+    parser.add_argument('--repeat', type=int, default=10, help="timings per getter, page and search run")
+    parser.add_argument('--pages', type=int, default=100, help="product pages per throughput run")
+    parser.add_argument('--concurrency', type=lambda value: [int(c) for c in value.split(',')], default=[1, 2, 4, 8])
+    parser.add_argument('--output', default='bench_results.jsonl', help="every run is appended as one JSON line")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_suite(args))
+    print_report(results)
+
+    record = {'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+              'commit': git_commit(), 'python': platform.python_version(), 'platform': platform.platform(),
+              'cpu_count': os.cpu_count(), 'repeat': args.repeat, **results}
+    with open(args.output, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+    print(f"Results appended to {args.output}.")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,215 @@
+import os
+import re
+import ast
+import uuid
+import shutil
+import datetime
+from decimal import Decimal, InvalidOperation
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from product_record import field_name
+
+NOT_AVAILABLE = "Not Available"
+STRING_LITERAL = re.compile(r"'[^'\\]*(?:\\.[^'\\]*)*'|\"[^\"\\]*(?:\\.[^\"\\]*)*\"")
+WHITESPACE = re.compile(r"\s+")
+
+# The canonical column names (see canonical_column), by the type they are stored as
+PRICE_COLUMNS = {'mrp', 'sale_price'}
+RATING_COLUMNS = {'star_rating'}
+COUNT_COLUMNS = {'number_of_reviews'}
+MAP_COLUMNS = {'technical_details'}
+LIST_COLUMNS = {'description'}
+FLAG_COLUMNS = {'sponsored'}
+DATE_COLUMNS = {'date'}
+
+# The scrapers' outputs name the same field differently; every dataset is written under the newest scraper's names
+ALIASES = {
+    'product_link': 'product_url',
+    'number_of_ratings': 'number_of_reviews',
+    'original_price': 'MRP',
+    'mrp': 'MRP',
+    'offer_price': 'sale_price',
+    'product_color': 'colour',
+    'bullet_points': 'description',
+}
+
+
+def missing(value):
+    return value is None or (isinstance(value, str) and value.strip() in ("", NOT_AVAILABLE))
+
+
+def clean_text(value):
+    # Amazon pads the detail tables with left-to-right marks, which also show up as "â€Ž" in mis-decoded files
+    return str(value).replace("‎", "").replace("â€Ž", "").strip()
+
+
+def to_minor_units(value):
+    # "₹13,590.00" or the int 13590 (rupees, as get_offer_price returns it) -> 1359000 paise
+    if missing(value):
+        return None
+    if isinstance(value, int):
+        return value * 100
+    try:
+        return int(Decimal(re.sub(r"[^\d.]", "", str(value))) * 100)
+    except InvalidOperation:
+        return None
+
+
+def to_rating(value):
+    # "4.0 out of 5 stars" or "4" -> 4.0
+    if missing(value):
+        return None
+    try:
+        return float(str(value).split()[0])
+    except ValueError:
+        return None
+
+
+def to_count(value):
+    # "2,833", "(2,833)" or "2,833 ratings" -> 2833
+    if missing(value):
+        return None
+    digits = re.sub(r"[^\d]", "", str(value).split()[0])
+    return int(digits) if digits else None
+
+
+def unquote(token):
+    # Only a single string literal ever reaches literal_eval, and only when it has escapes in it
+    return ast.literal_eval(token) if "\\" in token else token[1:-1]
+
+
+def parse_literal(text):
+    # The repr of a dict of strings or a list of strings, read with two regex passes instead of a Python parse.
+    # Whatever is left between the string literals has to be exactly the punctuation of that dict or list.
+    tokens = STRING_LITERAL.findall(text)
+    shape = WHITESPACE.sub("", STRING_LITERAL.sub("", text))
+    if shape == "{" + ",".join([":"] * (len(tokens) // 2)) + "}" and len(tokens) % 2 == 0:
+        values = [unquote(token) for token in tokens]
+        return dict(zip(values[::2], values[1::2]))
+    if shape == ("[" + "," * (len(tokens) - 1) + "]" if tokens else "[]"):
+        return [unquote(token) for token in tokens]
+    return None
+
+
+def literal(value, kind):
+    # Live rows hold dicts and lists, the CSVs their Python repr
+    if isinstance(value, str):
+        value = parse_literal(value)
+    return value if isinstance(value, kind) else None
+
+
+def to_map(value):
+    if missing(value):
+        return None
+    # A dict, a TechSpecs record or the dict's repr
+    spec = value if hasattr(value, "items") else literal(value, dict)
+    return None if spec is None else [(clean_text(key), clean_text(item)) for key, item in spec.items()]
+
+
+def to_list(value):
+    if missing(value):
+        return None
+    items = literal(value, (list, tuple))
+    return None if items is None else [clean_text(item) for item in items]
+
+
+def to_flag(value):
+    if missing(value):
+        return None
+    return value if isinstance(value, bool) else str(value).strip().lower() == "true"
+
+
+def to_date(value):
+    if missing(value):
+        return None
+    if isinstance(value, datetime.date):
+        return value
+    for date_format in ("%Y-%m-%d", "%m/%d/%Y"):
+        try:
+            return datetime.datetime.strptime(str(value).strip(), date_format).date()
+        except ValueError:
+            pass
+    return None
+
+
+def to_string(value):
+    return None if missing(value) else clean_text(value)
+
+
+def canonical_column(column):
+    # 'Date' -> 'date', 'Product Link' -> 'product_url', 'Technical Details' -> 'technical_details'
+    name = field_name(column)
+    return ALIASES.get(name, name)
+
+
+def column_type(column):
+    name = column.lower()
+    if name in PRICE_COLUMNS:
+        return pa.int64(), to_minor_units
+    if name in RATING_COLUMNS:
+        return pa.float64(), to_rating
+    if name in COUNT_COLUMNS:
+        return pa.int64(), to_count
+    if name in MAP_COLUMNS:
+        return pa.map_(pa.string(), pa.string()), to_map
+    if name in LIST_COLUMNS:
+        return pa.list_(pa.string()), to_list
+    if name in FLAG_COLUMNS:
+        return pa.bool_(), to_flag
+    if name in DATE_COLUMNS:
+        return pa.date32(), to_date
+    return pa.string(), to_string
+
+
+def to_table(columns, rows):
+    # Typed Arrow table of a batch of rows; scrapers without a date column get the crawl date as "date"
+    arrays = {}
+    for i, column in enumerate(columns):
+        arrow_type, convert = column_type(column)
+        arrays[column] = pa.array([convert(row[i]) for row in rows], type=arrow_type)
+    if "date" not in columns:
+        arrays["date"] = pa.array([datetime.date.today()] * len(rows), type=pa.date32())
+    return pa.table(arrays)
+
+
+class ParquetDataset:
+    # A Parquet dataset directory partitioned by crawl date (<output>.parquet/date=2023-02-19/part-*.parquet), so
+    # months of daily crawls form one dataset and a reader only opens the columns and days it asks for. Columns are
+    # stored under their canonical names, so a live crawl and history_loader write the same schema.
+    def __init__(self, path, columns, append=False):
+        self.path = path
+        self.columns = list(map(canonical_column, columns))
+        self.partition = "date"
+        self.append = append
+        self.run = uuid.uuid4().hex
+        self.replaced = set()
+        self.batches = 0
+
+    def write(self, rows):
+        self.write_table(to_table(self.columns, rows))
+
+    def write_table(self, table):
+        if not self.append:
+            # A rerun replaces the days it writes and leaves every other day alone
+            for day in set(table.column(self.partition).to_pylist()) - self.replaced:
+                shutil.rmtree(os.path.join(self.path, f"{self.partition}={day}"), ignore_errors=True)
+                self.replaced.add(day)
+        pq.write_to_dataset(table, self.path, partition_cols=[self.partition],
+                            basename_template=f"part-{self.run}-{self.batches}-{{i}}.parquet",
+                            existing_data_behavior="overwrite_or_ignore")
+        self.batches += 1
+
+    def compact(self):
+        # One file per day for this run instead of one per flushed batch
+        for day in os.listdir(self.path) if os.path.isdir(self.path) else []:
+            directory = os.path.join(self.path, day)
+            parts = sorted((name for name in os.listdir(directory) if name.startswith(f"part-{self.run}-")),
+                           key=lambda name: int(name.split("-")[2]))
+            if len(parts) < 2:
+                continue
+            table = pa.concat_tables(pq.read_table(os.path.join(directory, name)) for name in parts)
+            pq.write_table(table, os.path.join(directory, f"part-{self.run}.parquet"))
+            for name in parts:
+                os.remove(os.path.join(directory, name))
@@ -0,0 +1,118 @@
+import os
+
+# Number of product pages crawled at the same time (1 = the old sequential crawl)
+CONCURRENCY = int(os.environ.get("SCRAPER_CONCURRENCY", "4"))
+
+# "live" runs the get_* functions against the open page, "snapshot" only takes page.content()
+# and parses the HTML in a pool of PARSE_WORKERS processes. Applies to every scraper with an HTML snapshot parser
+# (a snapshot_row function), whether run directly or through sharded_crawl/distributed_crawl; the others warn and
+# stay live. The same goes for FETCH_MODE="http".
+PARSE_MODE = os.environ.get("SCRAPER_PARSE_MODE", "live")
+PARSE_WORKERS = int(os.environ.get("SCRAPER_PARSE_WORKERS", str(os.cpu_count() or 1)))
+
+# Requests aborted by resource_blocking.py: Playwright resource types and URL substrings (comma separated)
+BLOCK_RESOURCE_TYPES = [t for t in os.environ.get("SCRAPER_BLOCK_RESOURCE_TYPES", "image,media,font").split(",") if t]
+BLOCK_URL_PATTERNS = [p for p in os.environ.get(
+    "SCRAPER_BLOCK_URL_PATTERNS",
+    "amazon-adsystem.com,doubleclick.net,google-analytics.com,googletagmanager.com,"
+    "/uedata,/rd/uedata,unagi.amazon,fls-eu.amazon,fls-fe.amazon,/ajax/counter").split(",") if p]
+
+# page.goto returns at DOMContentLoaded, then waits at most READY_TIMEOUT ms for the page's readiness anchor
+NAVIGATION_TIMEOUT = int(os.environ.get("SCRAPER_NAVIGATION_TIMEOUT", "30000"))
+READY_TIMEOUT = int(os.environ.get("SCRAPER_READY_TIMEOUT", "10000"))
+
+# "browser" loads product pages in Playwright, "http" fetches them with a pooled HTTP/2 client
+# and only falls back to the browser when the response looks blocked or incomplete
+FETCH_MODE = os.environ.get("SCRAPER_FETCH_MODE", "browser")
+HTTP_CONNECTIONS = int(os.environ.get("SCRAPER_HTTP_CONNECTIONS", "20"))
+HTTP_TIMEOUT = float(os.environ.get("SCRAPER_HTTP_TIMEOUT", "15"))
+
+# Every crawl worker gets its own browser context, replaced by a fresh one after CONTEXT_MAX_NAVIGATIONS pages
+# (0 = never) or once the browser processes use more than BROWSER_MAX_RSS_MB (0 = no limit, needs psutil).
+# CONTEXT_SPARES replacement contexts are opened ahead of time (0 = one per crawl worker, since the workers reach
+# CONTEXT_MAX_NAVIGATIONS at about the same time and a memory recycle replaces all of them at once).
+CONTEXT_MAX_NAVIGATIONS = int(os.environ.get("SCRAPER_CONTEXT_MAX_NAVIGATIONS", "100"))
+BROWSER_MAX_RSS_MB = int(os.environ.get("SCRAPER_BROWSER_MAX_RSS_MB", "2048"))
+CONTEXT_SPARES = int(os.environ.get("SCRAPER_CONTEXT_SPARES", "0"))
+
+# Rows are appended to the output file as they are scraped and flushed every OUTPUT_BATCH_SIZE rows.
+# OUTPUT_FORMAT is "csv", "jsonl" or "parquet": a <output>.parquet/ dataset partitioned by date, with prices in
+# paise, ratings as floats, technical details as a map column and bullet points as a list column, under the same
+# column names as history_loader writes (needs pyarrow)
+OUTPUT_FORMAT = os.environ.get("SCRAPER_OUTPUT_FORMAT", "csv")
+OUTPUT_BATCH_SIZE = int(os.environ.get("SCRAPER_OUTPUT_BATCH_SIZE", "20"))
+
+# Navigation retries: up to RETRY_MAX_ATTEMPTS per URL with exponential backoff (full jitter) from
+# RETRY_BASE_DELAY up to RETRY_MAX_DELAY seconds. Across the crawl, retries may add at most RETRY_BUDGET_RATIO
+# extra requests per request (plus RETRY_BUDGET_MIN). BREAKER_THRESHOLD throttling responses in a row
+# (503/429/robot check) pause every navigation for BREAKER_COOLDOWN seconds, doubling up to BREAKER_MAX_COOLDOWN.
+RETRY_MAX_ATTEMPTS = int(os.environ.get("SCRAPER_RETRY_MAX_ATTEMPTS", "5"))
+RETRY_BASE_DELAY = float(os.environ.get("SCRAPER_RETRY_BASE_DELAY", "1"))
+RETRY_MAX_DELAY = float(os.environ.get("SCRAPER_RETRY_MAX_DELAY", "60"))
+RETRY_BUDGET_RATIO = float(os.environ.get("SCRAPER_RETRY_BUDGET_RATIO", "0.2"))
+RETRY_BUDGET_MIN = int(os.environ.get("SCRAPER_RETRY_BUDGET_MIN", "20"))
+BREAKER_THRESHOLD = int(os.environ.get("SCRAPER_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.environ.get("SCRAPER_BREAKER_COOLDOWN", "60"))
+BREAKER_MAX_COOLDOWN = float(os.environ.get("SCRAPER_BREAKER_MAX_COOLDOWN", "900"))
+
+# Per-host AIMD rate limit in front of every navigation, in requests per second: it starts at RATE_INITIAL
+# (0 turns the limiter off), grows by RATE_INCREASE per second while responses are healthy and is multiplied by
+# RATE_DECREASE on a 503, robot check or timeout, always between RATE_MIN and RATE_MAX. RATE_BURST requests
+# may go out back to back.
+RATE_INITIAL = float(os.environ.get("SCRAPER_RATE_INITIAL", "1"))
+RATE_MIN = float(os.environ.get("SCRAPER_RATE_MIN", "0.1"))
+RATE_MAX = float(os.environ.get("SCRAPER_RATE_MAX", "10"))
+RATE_INCREASE = float(os.environ.get("SCRAPER_RATE_INCREASE", "0.1"))
+RATE_DECREASE = float(os.environ.get("SCRAPER_RATE_DECREASE", "0.5"))
+RATE_BURST = float(os.environ.get("SCRAPER_RATE_BURST", "2"))
+
+# Distributed crawl (distributed_crawl.py): where the shared work queue lives (a .sqlite file, or a directory
+# for the file-based queue), how long a worker's claim on a URL lasts without a heartbeat, and how often it renews it
+QUEUE = os.environ.get("SCRAPER_QUEUE", "crawl_queue.sqlite")
+QUEUE_LEASE_SECONDS = float(os.environ.get("SCRAPER_QUEUE_LEASE_SECONDS", "300"))
+QUEUE_HEARTBEAT_SECONDS = float(os.environ.get("SCRAPER_QUEUE_HEARTBEAT_SECONDS", "60"))
+
+# A product link that failed this many times is given up on (per crawl, across restarts)
+MAX_ATTEMPTS = int(os.environ.get("SCRAPER_MAX_ATTEMPTS", "3"))
+
+# "deep" visits every product page; "serp" writes one row per search result card (title, prices, rating, reviews)
+# to <output>.cards.csv from the search pages alone, for quick price snapshots without the tech-spec fields.
+# "delta" only visits the product pages of new ASINs, of ASINs whose card price, MRP, rating or review count
+# changed, and of rows older than DELTA_REFRESH_DAYS; every other row is carried forward from
+# <output>.snapshot.sqlite, so the output is still the full catalogue.
+CRAWL_DEPTH = os.environ.get("SCRAPER_CRAWL_DEPTH", "deep")
+DELTA_CRAWL = CRAWL_DEPTH == "delta"
+DELTA_REFRESH_DAYS = float(os.environ.get("SCRAPER_DELTA_REFRESH_DAYS", "7"))
+
+# Products scraped less than FRESHNESS_HOURS ago (0 = always scrape) are skipped by the next crawl. SEEN_INDEX is
+# "sqlite" (exact, <output>.seen.sqlite), "bloom" (fixed size, for very large crawls, <output>.seen.bloom/ sized
+# for BLOOM_CAPACITY ASINs per half window at BLOOM_ERROR_RATE false positives) or "" to keep no index.
+FRESHNESS_HOURS = float(os.environ.get("SCRAPER_FRESHNESS_HOURS", "20"))
+SEEN_INDEX = os.environ.get("SCRAPER_SEEN_INDEX", "sqlite")
+BLOOM_CAPACITY = int(os.environ.get("SCRAPER_BLOOM_CAPACITY", "1000000"))
+BLOOM_ERROR_RATE = float(os.environ.get("SCRAPER_BLOOM_ERROR_RATE", "0.001"))
+if DELTA_CRAWL:
+    # The delta crawl decides what to scrape from the card signals and writes every product, unchanged ones included
+    FRESHNESS_HOURS = 0
+
+# On-disk cache of search and product pages ("" disables it); TTLs in seconds per page type
+CACHE_DIR = os.environ.get("SCRAPER_CACHE_DIR", ".page_cache")
+CACHE_TTL_SEARCH = int(os.environ.get("SCRAPER_CACHE_TTL_SEARCH", str(60 * 60)))
+CACHE_TTL_PRODUCT = int(os.environ.get("SCRAPER_CACHE_TTL_PRODUCT", str(12 * 60 * 60)))
+CACHE_MAX_BYTES = int(os.environ.get("SCRAPER_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+
+# Timing spans, counters and gauges of a crawl are written next to the output at the end of the run,
+# as "json" (<output>.metrics.json) or "prometheus" text (<output>.metrics.prom); "" only prints the summary
+METRICS_FORMAT = os.environ.get("SCRAPER_METRICS_FORMAT", "json")
+
+# "record" saves every page the scraper loads to a HAR archive, "replay" serves the crawl from that archive
+# with no network access at all; the archive defaults to <output>.har.zip next to the output file.
+# Both modes bypass the page cache and the HTTP fetcher, so the archive holds exactly what the browser saw.
+HAR_MODE = os.environ.get("SCRAPER_HAR_MODE", "")
+HAR_PATH = os.environ.get("SCRAPER_HAR_PATH", "")
+if HAR_MODE:
+    CACHE_DIR = ""
+    FETCH_MODE = "browser"
+if HAR_MODE == "replay":
+    # Nothing goes to amazon.in, so a replay runs as fast as the pipeline can go
+    RATE_INITIAL = 0
@@ -0,0 +1,180 @@
+import asyncio
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+from config import CONCURRENCY, FETCH_MODE, PARSE_MODE, PARSE_WORKERS
+from metrics import METRICS
+from navigation import PRODUCT_READY_SELECTOR, perform_request_with_retry
+from offline_parser import parse_in_pool
+from page_pool import PagePool
+
+
+async def crawl_products(browser, links, scrape_product, concurrency=CONCURRENCY, parse=None,
+                         setup_page=None, report_progress=True, sink=None, frontier=None, pool=None):
+    # Every worker owns one pooled page and pulls (index, link) pairs from a shared queue
+    queue = asyncio.Queue()
+    for i, link in enumerate(links):
+        queue.put_nowait((i, link))
+
+    # Results are stored by index so the output order matches the sequential crawl,
+    # unless they are streamed to a sink as soon as they are ready
+    results = [] if sink else [None] * len(links)
+    parsing = set()
+    parse_errors = []
+    num_processed = 0
+    # functools.partial wrappers (the HTTP fetcher) are timed under the name of the function they wrap
+    stage = getattr(scrape_product, "func", scrape_product).__name__
+
+    async def finish(i, link, result):
+        if parse:
+            try:
+                with METRICS.span("parse_seconds"):
+                    result = await parse(result)
+            except Exception as error:
+                if not frontier:
+                    raise
+                # Same as a failed scrape: a page the parser cannot read is recorded instead of stopping the crawl
+                frontier.mark_failed(link, str(error))
+                print(f"Failed to parse {link}: {error}")
+                return
+        if sink:
+            # A link only counts as done in the frontier once its row has been flushed to disk
+            sink.write(result, key=link)
+        else:
+            results[i] = result
+            if frontier:
+                frontier.mark_done([link])
+
+    def parsed(task):
+        parsing.discard(task)
+        if not task.cancelled() and task.exception():
+            parse_errors.append(task.exception())
+
+    num_workers = max(1, min(concurrency, len(links)))
+    # A caller that crawls batch after batch (distributed_crawl) passes its own pool, so warm contexts carry over
+    own_pool = pool is None
+    if own_pool:
+        pool = PagePool(browser, setup_page, workers=num_workers)
+
+    async def worker():
+        nonlocal num_processed
+        slot = await pool.open()
+        try:
+            while True:
+                try:
+                    i, link = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if frontier:
+                    frontier.mark_in_flight(link)
+                try:
+                    with METRICS.span("scrape_seconds", stage=stage):
+                        result = await scrape_product(slot.page, link)
+                except Exception as error:
+                    if not frontier:
+                        raise
+                    # With a frontier a failed link is recorded and retried by a later run instead of stopping the crawl
+                    frontier.mark_failed(link, str(error))
+                    print(f"Failed to scrape {link}: {error}")
+                    result = None
+                # Long-lived pages get slow and bloated, the pool swaps in a fresh context when this one is used up
+                slot = await pool.after_navigation(slot)
+
+                if result is None:
+                    # Failed link, already recorded in the frontier
+                    pass
+                elif parse:
+                    # With a parse stage the page goes straight back to fetching while the result is parsed
+                    task = asyncio.ensure_future(finish(i, link, result))
+                    parsing.add(task)
+                    task.add_done_callback(parsed)
+                else:
+                    await finish(i, link, result)
+                num_processed += 1
+
+                if not report_progress:
+                    continue
+                if num_processed % 10 == 0 and num_processed < len(links):
+                    print(f"Processed {num_processed} links.")
+                if num_processed == len(links):
+                    print(f"All information for link {num_processed - 1} has been scraped.")
+        finally:
+            pool.release(slot)
+
+    workers = [asyncio.create_task(worker()) for _ in range(num_workers)]
+    try:
+        await asyncio.gather(*workers)
+        await asyncio.gather(*parsing)
+        if parse_errors:
+            raise parse_errors[0]
+    except:
+        # One failed link stops the whole crawl, just like the sequential loop did
+        pending = workers + list(parsing)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        raise
+    finally:
+        if own_pool:
+            await pool.close()
+    return results
+
+
+async def snapshot_product(page, url):
+    await perform_request_with_retry(page, url, PRODUCT_READY_SELECTOR)
+    # Only take the HTML so the page can move on to the next URL straight away
+    return url, await page.content()
+
+
+class ProductScraper:
+    # How every scraper and launcher turns product links into rows, as PARSE_MODE and FETCH_MODE ask: the script's
+    # live getters, a page.content() snapshot parsed in PARSE_WORKERS processes while the pages keep fetching, or
+    # the HTML over pooled HTTP/2 with the browser page only as fallback. The last two need the script's
+    # snapshot_row(url, fields), which builds its row from what offline_parser.parse_product_html reads.
+    def __init__(self, scrape_product, snapshot_row=None, cache=None, parse_mode=PARSE_MODE, fetch_mode=FETCH_MODE):
+        self.scrape_product = scrape_product
+        self.snapshot_row = snapshot_row
+        self.cache = cache
+        self.offline = parse_mode == "snapshot" or fetch_mode == "http"
+        if self.offline and snapshot_row is None:
+            print(f"Warning: this scraper has no HTML snapshot parser, SCRAPER_PARSE_MODE={parse_mode} and "
+                  f"SCRAPER_FETCH_MODE={fetch_mode} are ignored and products are scraped with the live getters.")
+            self.offline = False
+        self.http = self.offline and fetch_mode == "http"
+        self.executor = None
+        self.fetcher = None
+
+    async def __aenter__(self):
+        if self.offline:
+            self.executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+        if self.http:
+            from http_fetcher import HttpFetcher
+
+            self.fetcher = HttpFetcher(cache=self.cache)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self.fetcher:
+            await self.fetcher.__aexit__(*exc_info)
+            self.fetcher.print_summary()
+        if self.executor:
+            self.executor.shutdown()
+
+    async def parse(self, snapshot):
+        url, html = snapshot
+        return self.snapshot_row(url, await parse_in_pool(self.executor, html))
+
+    async def crawl(self, browser, links, **kwargs):
+        if not self.offline:
+            return await crawl_products(browser, links, self.scrape_product, **kwargs)
+        fetch_product = snapshot_product
+        if self.fetcher:
+            # Fetch over pooled HTTP/2 and only use the browser page when the response looks blocked
+            fetch_product = functools.partial(self.fetcher.fetch_or_snapshot, snapshot_product=snapshot_product)
+        return await crawl_products(browser, links, fetch_product, parse=self.parse, **kwargs)
+
+
+async def scrape_products(browser, links, scrape_product, snapshot_row=None, cache=None, **kwargs):
+    # One crawl of links with crawl_products' keyword arguments (setup_page, sink, frontier, ...)
+    async with ProductScraper(scrape_product, snapshot_row, cache) as scraper:
+        return await scraper.crawl(browser, links, **kwargs)
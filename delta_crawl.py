@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import sqlite3
+import datetime
+
+from asin_index import extract_asin
+from config import DELTA_CRAWL, DELTA_REFRESH_DAYS, HAR_MODE
+from output_sink import json_value
+
+# The search result card fields that decide whether a product page has to be scraped again
+SIGNALS = ('sale_price', 'MRP', 'star_rating', 'number_of_reviews')
+
+
+def snapshot_path(output_path):
+    # product_data.csv -> product_data.snapshot.sqlite
+    if HAR_MODE == "replay":
+        return ":memory:"
+    return os.path.splitext(output_path)[0] + ".snapshot.sqlite"
+
+
+class DeltaStore:
+    # Last deep-scraped row of every ASIN together with the card signals it was scraped under. A crawl only
+    # scrapes new products, products whose card changed and rows older than DELTA_REFRESH_DAYS; every other
+    # row is carried forward from the store with today's date.
+    def __init__(self, path, columns, enabled=DELTA_CRAWL, refresh_days=DELTA_REFRESH_DAYS):
+        self.enabled = enabled
+        self.refresh_seconds = refresh_days * 24 * 3600
+        self.date_index = next((i for i, column in enumerate(columns) if column.lower() == "date"), None)
+        self.unchanged = []
+        if not enabled:
+            return
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""CREATE TABLE IF NOT EXISTS products (
+                                     asin TEXT PRIMARY KEY,
+                                     signals TEXT,
+                                     row TEXT NOT NULL,
+                                     scraped_at REAL NOT NULL);
+                                 CREATE TABLE IF NOT EXISTS cards (
+                                     asin TEXT PRIMARY KEY,
+                                     signals TEXT NOT NULL)""")
+        self.db.commit()
+
+    def partition(self, links, cards):
+        # (links to scrape, links whose stored row is still good)
+        signals = {card['asin']: json.dumps([card[field] for field in SIGNALS]) for card in cards}
+        # Kept on disk, so rows scraped by a resumed crawl are still stored with the signals they were scraped under
+        self.db.execute("DELETE FROM cards")
+        self.db.executemany("INSERT OR REPLACE INTO cards (asin, signals) VALUES (?, ?)", signals.items())
+        self.db.commit()
+        oldest = time.time() - self.refresh_seconds
+        changed, unchanged = [], []
+        for link in links:
+            asin = extract_asin(link)
+            stored = self.db.execute("SELECT signals, scraped_at FROM products WHERE asin = ?", (asin,)).fetchone()
+            if (asin is None or stored is None or asin not in signals or stored[0] != signals[asin]
+                    or stored[1] < oldest):
+                changed.append(link)
+            else:
+                unchanged.append(link)
+        return changed, unchanged
+
+    def discover(self, discover_product_links):
+        # Wraps a scraper's discovery so the frontier only ever sees the links that need a deep scrape
+        if not self.enabled:
+            return discover_product_links
+
+        async def discover_changed():
+            cards = []
+            links = await discover_product_links(cards=cards)
+            changed, self.unchanged = self.partition(links, cards)
+            print(f"Delta crawl: {len(changed)} new or changed products, {len(self.unchanged)} unchanged.")
+            return changed
+        return discover_changed
+
+    def carry_forward(self, sink):
+        # Straight to the output sink: a carried row is not a fresh scrape and keeps its scraped_at
+        today = datetime.datetime.now().strftime("%Y-%m-%d")
+        for link in self.unchanged:
+            row = json.loads(self.db.execute("SELECT row FROM products WHERE asin = ?",
+                                             (extract_asin(link),)).fetchone()[0])
+            if self.date_index is not None:
+                row[self.date_index] = today
+            sink.write(row, key=link)
+        # On disk before the deep scrape starts, a resumed crawl does not discover (or carry forward) again
+        sink.flush()
+        if self.unchanged:
+            print(f"Carried forward {len(self.unchanged)} unchanged products.")
+        self.unchanged = []
+
+    def record(self, row, link):
+        asin = extract_asin(link) if link else None
+        if asin is None:
+            return
+        signals = self.db.execute("SELECT signals FROM cards WHERE asin = ?", (asin,)).fetchone()
+        self.db.execute("INSERT OR REPLACE INTO products (asin, signals, row, scraped_at) VALUES (?, ?, ?, ?)",
+                        (asin, signals[0] if signals else None, json.dumps(list(row), ensure_ascii=False,
+                                                                           default=json_value), time.time()))
+        self.db.commit()
+
+    def track(self, sink):
+        return DeltaSink(sink, self) if self.enabled else sink
+
+    def close(self):
+        if self.enabled:
+            self.db.close()
+
+
+class DeltaSink:
+    # An OutputSink that also stores every freshly scraped row in the delta store
+    def __init__(self, sink, store):
+        self.sink = sink
+        self.store = store
+
+    def write(self, row, key=None):
+        self.store.record(row, key)
+        self.sink.write(row, key=key)
+
+    def __getattr__(self, name):
+        return getattr(self.sink, name)
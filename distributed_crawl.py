@@ -0,0 +1,143 @@
+import os
+import glob
+import socket
+import asyncio
+import argparse
+from playwright.async_api import async_playwright
+
+from config import CONCURRENCY, QUEUE, QUEUE_HEARTBEAT_SECONDS
+from crawl_pool import ProductScraper
+from metrics import METRICS, metrics_path
+from output_sink import OutputSink, staging_format
+from page_pool import PagePool
+from page_setup import PageSetup
+from script_loader import load_script
+from sharded_crawl import discover_links, merge_shards, open_browser
+from work_queue import DONE, FAILED, LEASED, QUEUED, open_queue
+
+# How long an idle worker waits before asking the queue again while other workers still hold leases
+POLL_SECONDS = 10
+
+
+def worker_path(output_path, worker_id):
+    # product_data.csv -> product_data.worker-<host>-<pid>.csv
+    base, extension = os.path.splitext(output_path)
+    return f"{base}.worker-{worker_id}{extension}"
+
+
+class QueueFrontier:
+    # What crawl_products expects from a frontier, backed by the leases this worker holds in the shared queue
+    def __init__(self, queue, owner):
+        self.queue = queue
+        self.owner = owner
+        self.held = set()
+
+    def claim(self, limit):
+        urls = self.queue.claim(self.owner, limit)
+        self.held.update(urls)
+        return urls
+
+    def mark_in_flight(self, url):
+        pass
+
+    def mark_done(self, urls):
+        # Only acknowledged once the rows are flushed to this worker's output file
+        self.queue.ack(self.owner, urls)
+        self.held.difference_update(urls)
+
+    def mark_failed(self, url, error):
+        self.queue.fail(self.owner, url, error)
+        self.held.discard(url)
+
+    async def keep_leases(self):
+        while True:
+            await asyncio.sleep(QUEUE_HEARTBEAT_SECONDS)
+            self.queue.heartbeat(self.owner, list(self.held))
+
+
+def print_counts(queue):
+    counts = queue.counts()
+    print(f"Queue: {counts.get(QUEUED, 0)} queued, {counts.get(LEASED, 0)} leased, {counts.get(DONE, 0)} done, "
+          f"{counts.get(FAILED, 0)} failed.")
+    return counts
+
+
+async def coordinate(script, queue, wait):
+    # Every link of this crawl is queued again, and workers that are already running keep polling until they are
+    queue.start_crawl()
+    links = await discover_links(script)
+    queue.put(links)
+    queue.set_discovered()
+    print(f"Queued {len(links)} product links.")
+    if not wait:
+        return
+    # Wait for the workers, then merge the worker files that are visible from here (same host or shared directory)
+    while True:
+        counts = print_counts(queue)
+        if not counts.get(QUEUED, 0) and not counts.get(LEASED, 0):
+            break
+        await asyncio.sleep(POLL_SECONDS)
+    # Only the staged rows: each worker also leaves its product_data.worker-<id>.metrics.json next to them
+    outputs = sorted(glob.glob(os.path.splitext(worker_path(script.OUTPUT_FILE, "*"))[0] + f".{staging_format()}"))
+    if outputs:
+        sink, duplicates = merge_shards(script, outputs)
+        print(f"{sink.path} has been written successfully: {sink.rows_written} rows from {len(outputs)} workers, "
+              f"{duplicates} duplicates dropped.")
+
+
+async def work(script, queue, worker_id):
+    frontier = QueueFrontier(queue, worker_id)
+    heartbeat = asyncio.create_task(frontier.keep_leases())
+    async with async_playwright() as pw:
+        browser = await open_browser(pw, script)
+        setup_page = PageSetup()
+        # One page pool for the whole worker, so contexts are recycled by use rather than dropped after every batch
+        pool = PagePool(browser, setup_page, workers=CONCURRENCY)
+        # One scraper for the whole worker: its parse processes and HTTP client outlive the claimed batches
+        async with ProductScraper(script.scrape_product, getattr(script, "snapshot_row", None),
+                                  cache=setup_page.cache) as scraper:
+            with OutputSink(worker_path(script.OUTPUT_FILE, worker_id), script.COLUMNS, output_format=staging_format(),
+                            append=True, on_flush=frontier.mark_done) as sink:
+                while True:
+                    urls = frontier.claim(CONCURRENCY * 2)
+                    if not urls:
+                        counts = queue.counts()
+                        if queue.discovered() and not counts.get(QUEUED, 0) and not counts.get(LEASED, 0):
+                            break
+                        # The coordinator is still discovering links, or other workers hold the rest and their
+                        # leases may still expire and come back to the queue
+                        await asyncio.sleep(POLL_SECONDS)
+                        continue
+                    await scraper.crawl(browser, urls, sink=sink, frontier=frontier, report_progress=False,
+                                        pool=pool)
+                    # Acknowledge this batch now rather than when the sink's batch happens to fill up
+                    sink.flush()
+                    print(f"{worker_id}: {sink.rows_written} rows written.")
+        await pool.close()
+        await browser.close()
+    heartbeat.cancel()
+    print_counts(queue)
+    METRICS.write(metrics_path(sink.path))
+
+
+async def main(script_path, role, queue_path, wait):
+    script = load_script(script_path, "scraper")
+    queue = open_queue(queue_path)
+    try:
+        if role == "coordinator":
+            await coordinate(script, queue, wait)
+        else:
+            await work(script, queue, f"{socket.gethostname()}-{os.getpid()}")
+    finally:
+        queue.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Crawl one scraper's product links with workers on several machines.")
+    parser.add_argument("script", help="path of the scraper script, e.g. 'Playwright- Air fryer data- scraping code.py'")
+    parser.add_argument("role", choices=["coordinator", "worker"])
+    parser.add_argument("--queue", default=QUEUE, help="a .sqlite file or a directory for the file-based queue")
+    parser.add_argument("--wait", action="store_true",
+                        help="coordinator: wait for the workers and merge their output files")
+    args = parser.parse_args()
+    asyncio.run(main(args.script, args.role, args.queue, args.wait))
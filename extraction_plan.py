@@ -0,0 +1,157 @@
+from metrics import METRICS
+
+NOT_AVAILABLE = "Not Available"
+
+# One in-page script that resolves every field of a plan and returns them as a single JSON object.
+# It mirrors the Playwright selectors used by the get_* functions:
+#   css    -> page.query_selector(selector)
+#   row    -> "tr:has-text('<label>') <selector>"
+#   header -> "tr th:has-text('<label>') + <selector>"
+# :has-text() matching is case-insensitive on whitespace-normalised text, like Playwright's.
+EXTRACT_FIELDS_JS = """
+(plan) => {
+    const norm = (text) => (text || '').replace(/\\s+/g, ' ').trim().toLowerCase();
+    const hasText = (element, label) => norm(element.textContent).includes(label);
+
+    const inRowWithText = (element, label) => {
+        for (let tr = element.closest('tr'); tr; tr = tr.parentElement ? tr.parentElement.closest('tr') : null) {
+            if (hasText(tr, label)) return true;
+        }
+        return false;
+    };
+
+    const find = (field) => {
+        if (field.how === 'css') return document.querySelector(field.selector);
+        const label = norm(field.label);
+        if (field.how === 'row') {
+            for (const element of document.querySelectorAll('tr ' + field.selector)) {
+                if (inRowWithText(element, label)) return element;
+            }
+        }
+        if (field.how === 'header') {
+            for (const element of document.querySelectorAll('tr th + ' + field.selector)) {
+                const th = element.previousElementSibling;
+                if (th && th.tagName === 'TH' && hasText(th, label)) return element;
+            }
+        }
+        return null;
+    };
+
+    const read = (element, how) => {
+        if (how === 'innerText') return element.innerText;
+        if (how === 'innerHTML') return element.innerHTML;
+        return element.textContent;
+    };
+
+    const result = {};
+    for (const field of plan) {
+        let element = find(field);
+        if (element && field.inner) element = element.querySelector(field.inner);
+        if (!element) {
+            result[field.name] = null;
+        } else if (field.items) {
+            result[field.name] = Array.from(element.querySelectorAll(field.items), (item) => read(item, field.read));
+        } else {
+            result[field.name] = read(element, field.read);
+        }
+    }
+    return result;
+}
+"""
+
+
+def field(name, selector, how="css", label=None, read="textContent", inner=None, items=None, clean=None,
+          default=NOT_AVAILABLE):
+    return {"name": name, "selector": selector, "how": how, "label": label, "read": read, "inner": inner,
+            "items": items, "clean": clean, "default": default}
+
+
+def row_field(name, label, selector="td.a-size-base", read="innerText", clean=None):
+    return field(name, selector, how="row", label=label, read=read, clean=clean or remove_lrm)
+
+
+def header_field(name, label, selector="td", read="textContent", inner=None, clean=None):
+    return field(name, selector, how="header", label=label, read=read, inner=inner, clean=clean or remove_lrm)
+
+
+def remove_lrm(value):
+    # Drop the left-to-right marks Amazon puts in the spec tables (also in their mis-decoded 'â€Ž' form)
+    return value.replace('\u200e', '').replace('â€Ž', '')
+
+
+def remove_lrm_and_strip(value):
+    return remove_lrm(value).strip()
+
+
+def first_word(value):
+    return value.split(" ")[0]
+
+
+def after_rupee_sign(value):
+    return value.split("₹")[1]
+
+
+# Same fields, selectors and clean-up as the get_* functions of the 26-getter scraper, in its column order
+AIR_FRYER_FIELDS = [
+    field('product_name', '#productTitle'),
+    row_field('brand', 'Brand'),
+    field('star_rating', '.a-icon-row .a-icon-alt', read='innerText', clean=first_word),
+    field('num_ratings', '#acrCustomerReviewLink #acrCustomerReviewText', read='innerText', clean=first_word),
+    field('original_price', '.a-price.a-text-price', clean=after_rupee_sign),
+    field('offer_price', '.a-price-whole'),
+    header_field('best_sellers_rank', 'Best Sellers Rank', inner='span:nth-child(1)'),
+    row_field('output_wattage', 'Output Wattage'),
+    row_field('asin', 'ASIN'),
+    row_field('item_model_number', 'Item model number'),
+    row_field('min_temperature', 'Min Temperature Setting'),
+    row_field('wattage', 'Wattage'),
+    header_field('country_of_origin', 'Country of Origin', read='innerHTML', clean=remove_lrm_and_strip),
+    header_field('manufacturer', 'Manufacturer', clean=remove_lrm_and_strip),
+    row_field('is_dishwasher_safe', 'Is Dishwasher Safe'),
+    row_field('nonstick_coating', 'Has Nonstick Coating', clean=remove_lrm_and_strip),
+    row_field('model_name', 'Model Name', clean=remove_lrm_and_strip),
+    row_field('control_method', 'Control Method'),
+    row_field('item_weight', 'Item Weight'),
+    header_field('recommended_uses', 'Recommended Uses For Product', clean=remove_lrm_and_strip),
+    header_field('material', 'Material', clean=remove_lrm_and_strip),
+    row_field('capacity', 'Capacity'),
+    header_field('product_color', 'Colour', selector='td.a-size-base', clean=remove_lrm_and_strip),
+    row_field('product_dimensions', 'Product Dimensions'),
+    row_field('special_feature', 'Special Feature'),
+    field('bullet_points', '#feature-bullets ul.a-vertical', items='li', read='innerText', default=[]),
+]
+
+
+def compile_plan(fields):
+    # Only the selector part of each field goes to the browser, clean-up runs in Python
+    keys = ("name", "selector", "how", "label", "read", "inner", "items")
+    return [{key: f[key] for key in keys} for f in fields]
+
+
+def missing_value(f):
+    # Fresh list per record so rows never share the same [] default
+    return list(f["default"]) if isinstance(f["default"], list) else f["default"]
+
+
+def apply_plan(fields, raw):
+    values = {}
+    for f in fields:
+        value = raw.get(f["name"])
+        if value is None:
+            values[f["name"]] = missing_value(f)
+            continue
+        try:
+            values[f["name"]] = f["clean"](value) if f["clean"] else value
+        except Exception:
+            values[f["name"]] = missing_value(f)
+    return values
+
+
+async def extract_fields(page, fields=AIR_FRYER_FIELDS):
+    # A single page.evaluate round trip for every field instead of one or two per get_* call
+    try:
+        with METRICS.span("field_seconds", field="extract_fields"):
+            raw = await page.evaluate(EXTRACT_FIELDS_JS, compile_plan(fields))
+    except Exception:
+        raw = {}
+    return apply_plan(fields, raw)
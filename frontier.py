@@ -0,0 +1,124 @@
+import os
+import time
+import sqlite3
+
+from asin_index import open_seen_index, seen_path
+from config import FRESHNESS_HOURS, HAR_MODE, MAX_ATTEMPTS
+
+PENDING, IN_FLIGHT, DONE, FAILED = "pending", "in_flight", "done", "failed"
+
+
+def frontier_path(output_path):
+    # product_data.csv -> product_data.frontier.sqlite, so every scraper keeps its own crawl state.
+    # A replayed crawl always starts from scratch and leaves the live crawl's frontier alone.
+    if HAR_MODE == "replay":
+        return ":memory:"
+    return os.path.splitext(output_path)[0] + ".frontier.sqlite"
+
+
+class Frontier:
+    # Durable state of every product link of a crawl, so a restarted run carries on where it stopped
+    def __init__(self, path, max_attempts=MAX_ATTEMPTS, freshness_hours=FRESHNESS_HOURS):
+        self.max_attempts = max_attempts
+        self.freshness_hours = freshness_hours
+        self.resumed = False
+        # ASINs scraped by earlier crawls, which outlives the per-crawl url table
+        self.seen = open_seen_index(seen_path(path), freshness_hours)
+        self.db = sqlite3.connect(path)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS urls (
+                               url TEXT PRIMARY KEY,
+                               position INTEGER,
+                               state TEXT NOT NULL,
+                               attempts INTEGER NOT NULL DEFAULT 0,
+                               last_error TEXT,
+                               updated_at REAL)""")
+        self.db.commit()
+
+    def set_state(self, urls, state, error=None, attempt=False):
+        self.db.executemany(
+            f"UPDATE urls SET state = ?, last_error = ?, updated_at = ?"
+            f"{', attempts = attempts + 1' if attempt else ''} WHERE url = ?",
+            [(state, error, time.time(), url) for url in urls])
+        self.db.commit()
+
+    def add(self, urls):
+        start = self.db.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM urls").fetchone()[0]
+        self.db.executemany("INSERT OR IGNORE INTO urls (url, position, state, updated_at) VALUES (?, ?, ?, ?)",
+                            [(url, start + i, PENDING, time.time()) for i, url in enumerate(urls)])
+        self.db.commit()
+
+    def pending(self):
+        # Links still to do: never tried, interrupted mid-flight, or failed fewer than max_attempts times
+        rows = self.db.execute("SELECT url FROM urls WHERE state IN (?, ?) OR (state = ? AND attempts < ?) "
+                               "ORDER BY position", (PENDING, IN_FLIGHT, FAILED, self.max_attempts))
+        return [url for url, in rows]
+
+    def mark_in_flight(self, url):
+        self.set_state([url], IN_FLIGHT, attempt=True)
+
+    def mark_done(self, urls):
+        self.set_state(urls, DONE)
+        if self.seen:
+            self.seen.mark(urls)
+
+    def mark_failed(self, url, error):
+        self.set_state([url], FAILED, error=error)
+
+    def reset(self):
+        self.db.execute("DELETE FROM urls")
+        self.db.commit()
+
+    def interrupted(self):
+        # Links never finished by the previous run: it stopped before it got through its frontier
+        return self.db.execute("SELECT COUNT(*) FROM urls WHERE state IN (?, ?)", (PENDING, IN_FLIGHT)).fetchone()[0]
+
+    def retryable(self):
+        return self.db.execute("SELECT url, attempts, last_error FROM urls WHERE state = ? AND attempts < ? "
+                               "ORDER BY position", (FAILED, self.max_attempts)).fetchall()
+
+    def carry_over(self, failures):
+        # Failed links of the previous crawl join this one with their attempt counts, so a dead link still runs
+        # out of attempts instead of being retried forever
+        start = self.db.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM urls").fetchone()[0]
+        self.db.executemany("INSERT OR IGNORE INTO urls (url, position, state, updated_at) VALUES (?, ?, ?, ?)",
+                            [(url, start + i, FAILED, time.time()) for i, (url, _, _) in enumerate(failures)])
+        self.db.executemany("UPDATE urls SET attempts = ?, last_error = ? WHERE url = ?",
+                            [(attempts, error, url) for url, attempts, error in failures])
+        self.db.commit()
+
+    async def discover_or_resume(self, discover):
+        # Only resume a crawl that was interrupted; once it got through every link, go back to the search pages
+        if self.interrupted():
+            product_links = self.pending()
+            self.resumed = True
+            print(f"Resuming crawl with {len(product_links)} product links left.")
+            return product_links
+        failures = self.retryable()
+        self.reset()
+        product_links = await discover()
+        if self.seen and self.freshness_hours:
+            fresh = self.seen.fresh(product_links, self.freshness_hours * 3600)
+            if fresh:
+                print(f"Skipping {len(fresh)} products scraped in the last {self.freshness_hours:g} hours.")
+                product_links = [link for link in product_links if link not in fresh]
+                # Their rows are in the existing output file, so this crawl appends to it instead of replacing it
+                self.resumed = True
+        self.add(product_links)
+        if failures:
+            print(f"Retrying {len(failures)} product links that failed in the previous crawl.")
+            self.carry_over(failures)
+        return self.pending()
+
+    def counts(self):
+        return dict(self.db.execute("SELECT state, COUNT(*) FROM urls GROUP BY state").fetchall())
+
+    def print_summary(self):
+        counts = self.counts()
+        print(f"Frontier: {counts.get(DONE, 0)} done, {counts.get(FAILED, 0)} failed "
+              f"({len(self.retryable())} retried by the next crawl), "
+              f"{counts.get(PENDING, 0) + counts.get(IN_FLIGHT, 0)} left.")
+
+    def close(self):
+        self.db.close()
+        if self.seen:
+            self.seen.close()
@@ -0,0 +1,35 @@
+import os
+
+from config import HAR_MODE, HAR_PATH
+
+
+def har_path(output_path):
+    # product_data.csv -> product_data.har.zip, unless SCRAPER_HAR_PATH points somewhere else
+    return HAR_PATH or os.path.splitext(output_path)[0] + ".har.zip"
+
+
+async def open_context(browser, path, mode=HAR_MODE):
+    # What the scraper opens its pages from: the browser itself, or one context recording to / replaying from a HAR
+    if mode == "record":
+        # A .zip archive keeps the response bodies as separate entries instead of base64 inside the JSON
+        return await browser.new_context(record_har_path=path, record_har_mode="full",
+                                         record_har_content="attach" if path.endswith(".zip") else "embed")
+    if mode == "replay":
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No HAR archive at {path}, record one first with SCRAPER_HAR_MODE=record")
+        context = await browser.new_context()
+        # Anything the archive does not have is aborted instead of going out to the network
+        await context.route_from_har(path, not_found="abort")
+        print(f"Replaying the crawl from {path}.")
+        return context
+    if mode:
+        raise ValueError(f"Unknown SCRAPER_HAR_MODE {mode!r}, expected 'record' or 'replay'")
+    return browser
+
+
+async def close_context(browser, context, path, mode=HAR_MODE):
+    # Closing the recording context is what writes the HAR file
+    if context is not browser:
+        await context.close()
+    if mode == "record":
+        print(f"Recorded the crawl to {path}.")
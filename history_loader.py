@@ -0,0 +1,130 @@
+import os
+import time
+import argparse
+import datetime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+
+from columnar_output import (NOT_AVAILABLE, ParquetDataset, canonical_column, column_type, parse_literal, to_count,
+                             to_date, to_list, to_map, to_minor_units, to_rating, to_string)
+from config import PARSE_WORKERS
+from normalization import clean_text, to_count as count_column, to_paise, to_rating as rating_column
+
+CHUNK_ROWS = 20_000
+
+# Column-wise versions of the per-value converters of the Parquet sink
+VECTORIZED = {
+    to_minor_units: to_paise,
+    to_rating: rating_column,
+    to_count: count_column,
+    to_string: lambda values: values,
+    to_date: lambda values: pd.to_datetime(values, format="mixed", errors="coerce"),
+}
+
+
+def strip_text(text):
+    # Marks written as a "\u200e" escape in the repr only turn into the character once the literal is parsed
+    return text.replace("\u200e", "").strip()
+
+
+def map_entries(spec):
+    return [(strip_text(key), strip_text(value)) for key, value in spec.items()] if isinstance(spec, dict) else None
+
+
+def list_items(items):
+    return [strip_text(item) for item in items] if isinstance(items, list) else None
+
+
+# The dict and list reprs lose their raw and mis-decoded left-to-right marks column-wise before the per-value parse
+PARSED = {to_map: map_entries, to_list: list_items}
+
+
+def typed_table(frame, columns):
+    arrays = {}
+    for column in columns:
+        arrow_type, convert = column_type(column)
+        if convert in VECTORIZED:
+            text = clean_text(frame[column].astype("string"))
+            text = text.mask(text.isin(["", NOT_AVAILABLE]))
+            arrays[column] = pa.array(VECTORIZED[convert](text), from_pandas=True).cast(arrow_type)
+        elif convert in PARSED:
+            text = clean_text(frame[column].astype("string"))
+            arrays[column] = pa.array([PARSED[convert](parse_literal(value)) if isinstance(value, str) else None
+                                       for value in text.tolist()], type=arrow_type)
+        else:
+            arrays[column] = pa.array([convert(value) for value in frame[column]], type=arrow_type)
+    return pa.table(arrays)
+
+
+def read_columns(paths):
+    # One schema for all files: the date first, then every column in the order it is first seen
+    columns = ['date']
+    for path in paths:
+        for column in map(canonical_column, pd.read_csv(path, nrows=0).columns):
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+
+def convert_chunk(frame, columns, fallback_date):
+    # Runs in a worker process: raw CSV text in, typed Arrow table out
+    frame = frame.rename(columns=canonical_column)
+    if 'date' not in frame:
+        # Files without a date column: the search's qid= timestamp in the product link is when it was crawled
+        qid = pd.to_numeric(frame['product_url'].str.extract(r"[?&]qid=(\d+)", expand=False), errors="coerce")
+        frame['date'] = pd.to_datetime(qid, unit="s").dt.strftime("%Y-%m-%d").fillna(fallback_date)
+    return typed_table(frame.reindex(columns=columns, fill_value=NOT_AVAILABLE), columns)
+
+
+def read_chunks(paths, chunk_rows):
+    for path in paths:
+        fallback_date = datetime.date.fromtimestamp(os.path.getmtime(path)).isoformat()
+        for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_rows):
+            yield chunk, fallback_date
+
+
+def load(paths, output_path, workers=PARSE_WORKERS, chunk_rows=CHUNK_ROWS):
+    # With workers=0 every chunk is converted in this process as it is read: one chunk in memory at a time.
+    # Otherwise at most two chunks per worker are in flight, so memory stays bounded either way.
+    columns = read_columns(paths)
+    dataset = ParquetDataset(output_path, columns)
+    rows = 0
+    if not workers:
+        for chunk, fallback_date in read_chunks(paths, chunk_rows):
+            table = convert_chunk(chunk, columns, fallback_date)
+            dataset.write_table(table)
+            rows += table.num_rows
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for chunk, fallback_date in read_chunks(paths, chunk_rows):
+                pending.append(executor.submit(convert_chunk, chunk, columns, fallback_date))
+                while len(pending) >= workers * 2 or (pending and pending[0].done()):
+                    table = pending.popleft().result()
+                    dataset.write_table(table)
+                    rows += table.num_rows
+            while pending:
+                table = pending.popleft().result()
+                dataset.write_table(table)
+                rows += table.num_rows
+    dataset.compact()
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load scraped CSV files into one date-partitioned Parquet dataset.")
+    parser.add_argument("paths", nargs="+",
+                        help="e.g. 'Air Fryer Product Data.csv' 'Air Fryer Product Data New.csv' product_data.csv")
+    parser.add_argument("--output", default="history.parquet")
+    parser.add_argument("--workers", type=int, default=PARSE_WORKERS,
+                        help="parser processes; 0 streams the files through this process one chunk at a time")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    rows = load(args.paths, args.output, args.workers, args.chunk_rows)
+    seconds = time.perf_counter() - start
+    print(f"{args.output} has been written successfully: {rows} rows from {len(args.paths)} files "
+          f"in {seconds:.1f} s ({rows / seconds:,.0f} rows/s).")
@@ -0,0 +1,81 @@
+import httpx
+
+from config import HTTP_CONNECTIONS, HTTP_TIMEOUT
+from navigation import looks_blocked
+from rate_limiter import RATE_LIMITER
+from retry_policy import RETRY_POLICY
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-IN,en;q=0.9",
+}
+
+
+def looks_complete(response, ready_marker):
+    if response.status_code != 200:
+        return False
+    html = response.text
+    return ready_marker in html and not looks_blocked(html)
+
+
+class HttpFetcher:
+    def __init__(self, connections=HTTP_CONNECTIONS, timeout=HTTP_TIMEOUT, cache=None):
+        # One client for the whole crawl: keep-alive connections and HTTP/2 multiplexing are reused
+        self.client = httpx.AsyncClient(
+            http2=True, headers=HEADERS, follow_redirects=True, timeout=timeout,
+            limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections))
+        self.cache = cache
+        self.cache_hits = 0
+        self.http_fetches = 0
+        self.browser_fetches = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+
+    async def fetch(self, url, ready_marker='id="productTitle"'):
+        # HTML of the page, or None when the caller should load it in the browser instead
+        cached = self.cache.get(url) if self.cache else None
+        if cached:
+            self.cache_hits += 1
+            return cached[2].decode("utf-8", "replace")
+        # HTTP requests share the browser's circuit breaker: a throttled host pauses both
+        await RETRY_POLICY.breaker.wait()
+        await RATE_LIMITER.acquire(url)
+        try:
+            response = await self.client.get(url)
+        except httpx.TimeoutException:
+            RATE_LIMITER.record_congestion(url)
+            return None
+        except httpx.HTTPError:
+            return None
+        if response.status_code in (429, 503) or looks_blocked(response.text):
+            RETRY_POLICY.breaker.record_throttle()
+            RATE_LIMITER.record_congestion(url)
+            return None
+        if not looks_complete(response, ready_marker):
+            return None
+        RETRY_POLICY.record_success()
+        RATE_LIMITER.record_success(url)
+        self.http_fetches += 1
+        if self.cache:
+            self.cache.put(url, response.status_code, response.headers, response.content)
+        return response.text
+
+    async def fetch_or_snapshot(self, page, url, snapshot_product):
+        html = await self.fetch(url)
+        if html is not None:
+            return url, html
+        self.browser_fetches += 1
+        return await snapshot_product(page, url)
+
+    def print_summary(self):
+        total = self.cache_hits + self.http_fetches + self.browser_fetches
+        if total:
+            print(f"Fetched {self.http_fetches} of {total} product pages over HTTP "
+                  f"({self.http_fetches / total:.0%}), {self.cache_hits} from the page cache "
+                  f"({self.cache_hits / total:.0%}), {self.browser_fetches} through the browser.")
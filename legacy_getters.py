@@ -0,0 +1,258 @@
+# The per-field getters "Amazon - Air Fryer - Product Data - Scraping Using Playwright.py" used before it switched
+# to extract_fields(AIR_FRYER_FIELDS): one query_selector round trip per field. Only kept as the baseline of
+# bench_extraction.py.
+
+
+async def get_product_name(page):
+    try:
+        product_name = await (await page.query_selector("#productTitle")).text_content()
+    except:
+        product_name = "Not Available"
+    return product_name
+
+
+async def get_brand(page):
+    try:
+        brand = await (await page.query_selector("tr:has-text('Brand') td.a-size-base")).inner_text()
+    except:
+        brand = "Not Available"
+    return brand
+
+
+async def get_star_rating(page):
+    try:
+        star_rating = await (await page.query_selector(".a-icon-row .a-icon-alt")).inner_text()
+        star_rating = star_rating.split(" ")[0]
+    except:
+        star_rating = "Not Available"
+    return star_rating
+
+
+async def get_num_ratings(page):
+    try:
+        num_ratings_elem = await page.query_selector("#acrCustomerReviewLink #acrCustomerReviewText")
+        num_ratings = await num_ratings_elem.inner_text()
+        num_ratings = num_ratings.split(" ")[0]
+    except:
+        num_ratings = "Not Available"
+    return num_ratings
+
+
+async def get_original_price(page):
+    try:
+        original_price = await (await page.query_selector(".a-price.a-text-price")).text_content()
+        original_price = original_price.split("₹")[1]
+    except:
+        original_price = "Not Available"
+    return original_price
+
+
+async def get_offer_price(page):
+    try:
+        offer_price = await (await page.query_selector(".a-price-whole")).text_content()
+    except:
+        offer_price = "Not Available"
+    return offer_price
+
+
+async def get_special_feature(page):
+    try:
+        special_feature_elem = await page.query_selector("tr:has-text('Special Feature') td.a-size-base")
+        special_features = await special_feature_elem.inner_text()
+        special_feature = special_features.replace('â€Ž', '')
+    except:
+        special_feature = "Not Available"
+    return special_feature
+
+
+async def get_product_dimensions(page):
+    try:
+        product_dimensions_element = await page.query_selector("tr:has-text('Product Dimensions') td.a-size-base")
+        product_dimension = await product_dimensions_element.inner_text()
+        product_dimensions = product_dimension.replace('â€Ž', '')
+    except:
+        product_dimensions = "Not Available"
+    return product_dimensions
+
+
+async def get_product_color(page):
+    try:
+        colors = await (await page.query_selector("tr th:has-text('Colour')+ td.a-size-base")).text_content()
+        color = colors.replace('â€Ž', '')
+    except:
+        color = "Not Available"
+    return color.strip()
+
+
+async def get_capacity(page):
+    try:
+        capacitys = await (await page.query_selector("tr:has-text('Capacity') td.a-size-base")).inner_text()
+        capacity = capacitys.replace('â€Ž', '')
+    except:
+        capacity = "Not Available"
+    return capacity
+
+
+async def get_material(page):
+    try:
+        materials = await (await page.query_selector("tr th:has-text('Material') + td")).text_content()
+        material = materials.replace('â€Ž', '')
+    except:
+        material = "Not Available"
+    return material.strip()
+
+
+async def get_recommended_uses(page):
+    try:
+        recommended_use = await (
+            await page.query_selector("tr th:has-text('Recommended Uses For Product') + td")).text_content()
+        recommended_uses = recommended_use.replace('â€Ž', '')
+    except:
+        recommended_uses = "Not Available"
+    return recommended_uses.strip()
+
+
+async def get_output_wattage(page):
+    try:
+        output_wattage = await (
+            await page.query_selector("tr:has-text('Output Wattage') td.a-size-base")).inner_text()
+        output_wattage = output_wattage.replace('â€Ž', '')
+    except:
+        output_wattage = "Not Available"
+    return output_wattage
+
+
+async def get_item_weight(page):
+    try:
+        item_weights = await (
+            await page.query_selector("tr:has-text('Item Weight') td.a-size-base")).inner_text()
+        item_weight = item_weights.replace('â€Ž', '')
+    except:
+        item_weight = "Not Available"
+    return item_weight
+
+
+
+async def get_control_method(page):
+    try:
+        control_methods = await (
+            await page.query_selector("tr:has-text('Control Method') td.a-size-base")).inner_text()
+        control_method = control_methods.replace('â€Ž', '')
+    except:
+        control_method = "Not Available"
+    return control_method
+
+
+async def get_model_name(page):
+    try:
+        model_names = await (await page.query_selector("tr:has-text('Model Name') td.a-size-base")).inner_text()
+        model_name = model_names.replace('â€Ž', '')
+    except:
+        model_name = "Not Available"
+    return model_name.strip()
+
+
+async def get_nonstick_coating(page):
+    try:
+        nonstick_coatings = await (
+            await page.query_selector("tr:has-text('Has Nonstick Coating') td.a-size-base")).inner_text()
+        nonstick_coating = nonstick_coatings.replace('â€Ž', '')
+    except:
+        nonstick_coating = "Not Available"
+    return nonstick_coating.strip()
+
+
+async def get_is_dishwasher_safe(page):
+    try:
+        is_dishwasher_safes = await (
+            await page.query_selector("tr:has-text('Is Dishwasher Safe') td.a-size-base")).inner_text()
+        is_dishwasher_safe = is_dishwasher_safes.replace('â€Ž', '')
+    except:
+        is_dishwasher_safe = "Not Available"
+    return is_dishwasher_safe
+
+
+async def get_manufacturer(page):
+    try:
+        manufacturers = await (
+            await page.query_selector("tr th:has-text('Manufacturer') + td")).text_content()
+        manufacturer = manufacturers.replace('â€Ž', '')
+    except:
+        manufacturer = "Not Available"
+    return manufacturer.strip()
+
+
+async def get_country_of_origin(page):
+    try:
+        country_of_origins = await (await page.query_selector("tr th:has-text('Country of Origin') + td")).inner_html()
+        country_of_origin = country_of_origins.replace('â€Ž', '')
+    except:
+        country_of_origin = "Not Available"
+    return country_of_origin.strip()
+
+
+async def get_item_model_number(page):
+    try:
+        item_model_numbers = await (
+            await page.query_selector("tr:has-text('Item model number') td.a-size-base")).inner_text()
+        item_model_number = item_model_numbers.replace('â€Ž', '')
+    except:
+        item_model_number = "Not Available"
+    return item_model_number
+
+
+async def get_wattage(page):
+    try:
+        wattage = await (await page.querySelector("tr:has-text('Wattage') td.a-size-base")).inner_text()
+        wattage = wattage.replace('â€Ž', '')
+    except:
+        wattage = "Not Available"
+    return wattage
+
+
+async def get_asin(page):
+    try:
+        asins = await (await page.query_selector("tr:has-text('ASIN') td.a-size-base")).inner_text()
+        asin = asins.replace('â€Ž', '')
+    except:
+        asin = "Not Available"
+    return asin
+
+
+async def get_min_temperature_setting(page):
+    try:
+        min_temperatures = await (
+            await page.query_selector("tr:has-text('Min Temperature Setting') td.a-size-base")).inner_text()
+        min_temperature = min_temperatures.replace('â€Ž', '')
+    except:
+        min_temperature = "Not Available"
+    return min_temperature
+
+
+async def get_best_sellers_rank(page):
+    try:
+        best_sellers_rank = await (
+            await page.query_selector("tr th:has-text('Best Sellers Rank') + td span:nth-child(1)")).text_content()
+    except:
+        best_sellers_rank = "Not Available"
+    return best_sellers_rank
+
+
+async def get_bullet_points(page):
+    bullet_points = []
+    try:
+        ul_element = await page.query_selector('#feature-bullets ul.a-vertical')
+        li_elements = await ul_element.query_selector_all('li')
+        for li in li_elements:
+            bullet_points.append(await li.inner_text())
+    except:
+        bullet_points = []
+    return bullet_points
+
+
+# In the scraper's CSV column order, after the product link
+GETTERS = [get_product_name, get_brand, get_star_rating, get_num_ratings, get_original_price, get_offer_price,
+           get_best_sellers_rank, get_output_wattage, get_asin, get_item_model_number, get_min_temperature_setting,
+           get_wattage, get_country_of_origin, get_manufacturer, get_is_dishwasher_safe, get_nonstick_coating,
+           get_model_name, get_control_method, get_item_weight, get_recommended_uses, get_material, get_capacity,
+           get_product_color, get_product_dimensions, get_special_feature, get_bullet_points]
@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import functools
+import contextlib
+
+from config import METRICS_FORMAT
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def metrics_path(output_path, output_format=METRICS_FORMAT):
+    # product_data.csv -> product_data.metrics.json (or .metrics.prom for the Prometheus text format)
+    extension = "prom" if output_format == "prometheus" else "json"
+    return os.path.splitext(output_path)[0] + f".metrics.{extension}"
+
+
+def quantile(ordered, q):
+    # Nearest-rank quantile of an already sorted list
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered) + 0.5) - 1))]
+
+
+def label_text(labels, **extra):
+    pairs = [*labels, *extra.items()]
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}" if pairs else ""
+
+
+class Metrics:
+    # Timings, counters and gauges of one crawl, keyed by (name, labels).
+    # A timing is one perf_counter pair and a list append, so it is cheap enough for every getter call.
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+        self.gauges = {}
+
+    def observe(self, name, seconds, **labels):
+        self.timings.setdefault((name, tuple(sorted(labels.items()))), []).append(seconds)
+
+    def increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    @contextlib.contextmanager
+    def span(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def summary(self):
+        timings = []
+        for (name, labels), samples in sorted(self.timings.items()):
+            ordered = sorted(samples)
+            timings.append({"name": name, "labels": dict(labels), "count": len(ordered), "sum": sum(ordered),
+                            **{f"p{round(q * 100)}": quantile(ordered, q) for q in QUANTILES},
+                            "max": ordered[-1]})
+        counters = [{"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self.counters.items())]
+        gauges = [{"name": name, "labels": dict(labels), "value": value}
+                  for (name, labels), value in sorted(self.gauges.items())]
+        return {"timings": timings, "counters": counters, "gauges": gauges}
+
+    def to_prometheus(self):
+        # Timings become Prometheus summaries (quantile series plus _sum and _count), all under a scraper_ prefix
+        lines = []
+        typed = set()
+        for kind, entries in (("summary", self.timings), ("counter", self.counters), ("gauge", self.gauges)):
+            for (name, labels), value in sorted(entries.items()):
+                metric = f"scraper_{name}"
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} {kind}")
+                    typed.add(metric)
+                if kind != "summary":
+                    lines.append(f"{metric}{label_text(labels)} {value}")
+                    continue
+                ordered = sorted(value)
+                for q in QUANTILES:
+                    lines.append(f"{metric}{label_text(labels, quantile=q)} {quantile(ordered, q)}")
+                lines.append(f"{metric}_sum{label_text(labels)} {sum(ordered)}")
+                lines.append(f"{metric}_count{label_text(labels)} {len(ordered)}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, output_format=METRICS_FORMAT):
+        if not output_format:
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            if output_format == "prometheus":
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.summary(), f, indent=2)
+        print(f"Metrics written to {path}.")
+
+    def print_summary(self):
+        # Where the crawl time went: total seconds per timed stage, slowest first
+        totals = sorted(((sum(samples), name, labels) for (name, labels), samples in self.timings.items()),
+                        reverse=True)
+        for total, name, labels in totals[:10]:
+            ordered = sorted(self.timings[(name, labels)])
+            print(f"{name}{label_text(labels)}: {total:.1f} s over {len(ordered)} calls, "
+                  f"p50 {quantile(ordered, 0.5) * 1000:.0f} ms, p95 {quantile(ordered, 0.95) * 1000:.0f} ms, "
+                  f"p99 {quantile(ordered, 0.99) * 1000:.0f} ms")
+        for (name, labels), value in sorted({**self.counters, **self.gauges}.items()):
+            print(f"{name}{label_text(labels)}: {value:g}")
+
+
+# One registry per process, shared by the navigation, crawl, search and output code
+METRICS = Metrics()
+
+
+def timed_field(getter):
+    # Times every call of a get_* function under field_seconds{field="<function name>"}
+    @functools.wraps(getter)
+    async def wrapper(*args, **kwargs):
+        with METRICS.span("field_seconds", field=getter.__name__):
+            return await getter(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,73 @@
+import asyncio
+import weakref
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from config import NAVIGATION_TIMEOUT, READY_TIMEOUT
+from metrics import METRICS
+from rate_limiter import RATE_LIMITER
+from retry_policy import (CONGESTION_KINDS, RETRY_POLICY, HttpStatusError, MissingContentError, NavigationError,
+                          RobotCheckError, classify)
+
+# Elements that prove the server-rendered part of a page is there
+PRODUCT_READY_SELECTOR = "#productTitle"
+SEARCH_READY_SELECTOR = '.a-link-normal.s-underline-text.s-underline-link-text.s-link-style.a-text-normal'
+
+# Markers of Amazon's robot check and error pages
+BLOCKED_MARKERS = ("/errors/validateCaptcha", "Type the characters you see in this image", "api-services-support@amazon.com")
+ROBOT_CHECK_SELECTOR = 'form[action="/errors/validateCaptcha"]'
+
+# The ResponseCache that answers a page's document requests, registered by ResponseCache.install
+PAGE_CACHES = weakref.WeakKeyDictionary()
+
+
+def looks_blocked(html):
+    return any(marker in html for marker in BLOCKED_MARKERS)
+
+
+async def perform_request_with_retry(page, url, ready_selector=None, policy=RETRY_POLICY, limiter=RATE_LIMITER):
+    page_type = "search" if ready_selector == SEARCH_READY_SELECTOR else "product"
+    attempt = 0
+    # Whole navigation including retries and sleeps, given up or not, so slow pages and flaky ones both show up in
+    # the tail
+    with METRICS.span("navigation_seconds", page=page_type):
+        while True:
+            # Waits here while the circuit breaker has the whole crawl paused
+            await policy.before_request()
+            # Every attempt, first or retry, waits for a token of the host's rate limit, unless the document is
+            # served from the page cache and never reaches the host
+            cache = PAGE_CACHES.get(page)
+            to_host = cache is None or not cache.fresh(url)
+            if to_host:
+                await limiter.acquire(url)
+            attempt += 1
+            try:
+                # Stop at DOMContentLoaded instead of waiting for every image, ad and tracker to finish
+                response = await page.goto(url, wait_until="domcontentloaded", timeout=NAVIGATION_TIMEOUT)
+                if response is not None and response.status >= 400:
+                    raise HttpStatusError(response.status)
+                if ready_selector:
+                    try:
+                        await page.wait_for_selector(ready_selector, state="attached", timeout=READY_TIMEOUT)
+                    except PlaywrightTimeoutError:
+                        # The robot check comes back as a 200 without the anchor, only look for it when the anchor
+                        # is missing
+                        if await page.query_selector(ROBOT_CHECK_SELECTOR):
+                            raise RobotCheckError()
+                        # The document is parsed at DOMContentLoaded, so an anchor still missing is not coming
+                        raise MissingContentError(ready_selector) from None
+                policy.record_success()
+                if to_host:
+                    limiter.record_success(url)
+                break
+            except Exception as error:
+                kind = classify(error)
+                if kind in CONGESTION_KINDS and to_host:
+                    limiter.record_congestion(url)
+                delay = policy.next_delay(kind, attempt)
+                if delay is None:
+                    METRICS.increment("navigation_failures_total", page=page_type, kind=kind)
+                    raise NavigationError(kind, url, attempt) from error
+                METRICS.increment("navigation_retries_total", page=page_type, kind=kind)
+                METRICS.increment("navigation_retry_sleep_seconds_total", delay, page=page_type)
+                await asyncio.sleep(delay)
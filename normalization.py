@@ -0,0 +1,187 @@
+import os
+import re
+import argparse
+
+import pandas as pd
+
+NOT_AVAILABLE = "Not Available"
+CHUNK_ROWS = 200_000
+
+# Where each scraper keeps a field: plain columns, or (column, key) inside the technical details dict
+SOURCES = {
+    'mrp_paise': ['Original Price', 'MRP'],
+    'sale_price_paise': ['Offer Price', 'sale_price'],
+    'star_rating': ['Star Rating', 'star_rating'],
+    'review_count': ['Number of Ratings', 'number_of_reviews'],
+    'weight_g': ['item_weight', ('Technical Details', 'Item Weight'), ('technical_details', 'Item Weight')],
+    'dimensions_cm': ['product_dimensions', ('Technical Details', 'Product Dimensions'),
+                      ('technical_details', 'Product Dimensions')],
+    'wattage_w': ['wattage', 'Wattage', 'output_wattage', ('Technical Details', 'Wattage'),
+                  ('technical_details', 'Wattage'), ('Technical Details', 'Output Wattage'),
+                  ('technical_details', 'Output Wattage')],
+}
+
+NUMBER = r"(\d+(?:\.\d+)?)"
+GRAMS = {'kg': 1000, 'kilogram': 1000, 'kilograms': 1000, 'g': 1, 'gram': 1, 'grams': 1, 'mg': 0.001,
+         'milligram': 0.001, 'milligrams': 0.001, 'lb': 453.592, 'lbs': 453.592, 'pound': 453.592,
+         'pounds': 453.592, 'hundredths pounds': 4.53592, 'oz': 28.3495, 'ounce': 28.3495, 'ounces': 28.3495}
+CENTIMETRES = {'cm': 1, 'centimeters': 1, 'centimetres': 1, 'mm': 0.1, 'millimeters': 0.1, 'millimetres': 0.1,
+               'm': 100, 'meters': 100, 'metres': 100, 'in': 2.54, 'inch': 2.54, 'inches': 2.54}
+WATTS = {'': 1, 'w': 1, 'watt': 1, 'watts': 1, 'kw': 1000, 'kilowatt': 1000, 'kilowatts': 1000}
+
+
+def clean_text(column):
+    # Left-to-right marks from the detail tables, raw and mis-decoded, then the padding around the text
+    return column.str.replace("‎", "", regex=False).str.replace("â€Ž", "", regex=False).str.strip()
+
+
+def source_values(frame, sources):
+    # The first source that has a value, row by row
+    values = pd.Series(pd.NA, index=frame.index, dtype="string")
+    for source in sources:
+        if isinstance(source, tuple):
+            column, key = source
+            if column not in frame:
+                continue
+            # The CSVs hold the dict's repr: {'Item Weight': '9 kg 640 g', ...}
+            candidate = frame[column].str.extract(rf"'{key}': '([^']*)'", expand=False)
+        elif source in frame:
+            candidate = frame[source]
+        else:
+            continue
+        candidate = clean_text(candidate.astype("string"))
+        values = values.fillna(candidate.mask(candidate.isin(["", NOT_AVAILABLE])))
+    return values
+
+
+def to_paise(values):
+    # "13,590.00" / "₹16,990" -> 1359000 / 1699000
+    rupees = pd.to_numeric(values.str.replace(r"[^\d.]", "", regex=True).replace("", pd.NA), errors="coerce")
+    return (rupees * 100).round().astype("Int64")
+
+
+def to_rating(values):
+    # "4", "3.8" or "4.0 out of 5 stars"
+    return pd.to_numeric(values.str.extract(rf"^{NUMBER}", expand=False), errors="coerce").astype("Float64")
+
+
+def to_count(values):
+    # "2,833", "(2,833)" or "2,833 ratings"
+    digits = values.str.extract(r"^\(?([\d,]+)", expand=False).str.replace(",", "", regex=False)
+    return pd.to_numeric(digits, errors="coerce").astype("Int64")
+
+
+def unit_sum(values, units):
+    # "9 kg 640 g" -> 9640.0 grams: every (number, unit) pair converted and added up per row
+    pattern = rf"{NUMBER}\s*({'|'.join(sorted(filter(None, units), key=len, reverse=True))})\b"
+    pairs = values.str.extractall(pattern, flags=re.IGNORECASE)
+    if pairs.empty:
+        return pd.Series(pd.NA, index=values.index, dtype="Float64")
+    amounts = pd.to_numeric(pairs[0]) * pairs[1].str.lower().map(units)
+    return amounts.groupby(level=0).sum().reindex(values.index).astype("Float64")
+
+
+def to_grams(values):
+    return unit_sum(values, GRAMS)
+
+
+def to_watts(values):
+    # "1800 Watts", "1.8 kW" or a bare "1100.00". The unit has to end the value or come before a delimiter, so
+    # energy ("1100 Watt Hours", "100 Kilowatt Hours") is reported as a failure instead of read as power.
+    units = '|'.join(sorted(filter(None, WATTS), key=len, reverse=True))
+    parts = values.str.extract(rf"^{NUMBER}\s*({units})?\s*(?:$|[,;/(])", flags=re.IGNORECASE)
+    factor = parts[1].fillna("").str.lower().map(WATTS)
+    return (pd.to_numeric(parts[0], errors="coerce") * factor).astype("Float64")
+
+
+def to_dimensions(values):
+    # "37.5D x 37.5W x 37.5H Centimeters" or "30 x 21 x 20 cm; 2.52 Kilograms" -> depth, width, height in cm
+    parts = values.str.extract(rf"{NUMBER}\s*[DWHL]?\s*x\s*{NUMBER}\s*[DWHL]?\s*x\s*{NUMBER}\s*[DWHL]?\s*"
+                               rf"({'|'.join(sorted(CENTIMETRES, key=len, reverse=True))})\b", flags=re.IGNORECASE)
+    factor = parts[3].str.lower().map(CENTIMETRES)
+    return pd.DataFrame({f"{side}_cm": (pd.to_numeric(parts[i]) * factor).astype("Float64")
+                         for i, side in enumerate(("depth", "width", "height"))}, index=values.index)
+
+
+PARSERS = {
+    'mrp_paise': to_paise,
+    'sale_price_paise': to_paise,
+    'star_rating': to_rating,
+    'review_count': to_count,
+    'weight_g': to_grams,
+    'dimensions_cm': to_dimensions,
+    'wattage_w': to_watts,
+}
+
+
+def normalize_frame(frame):
+    # Column-wise over a whole frame of raw rows (all strings): the original columns with clean text, one typed
+    # column per field (three for the dimensions), and for every field how many values were there and parsed
+    frame = frame.astype("string")
+    normalized = frame.apply(clean_text)
+    report = {}
+    failures = {}
+    for field, sources in SOURCES.items():
+        values = source_values(frame, sources)
+        parsed = PARSERS[field](values)
+        if isinstance(parsed, pd.DataFrame):
+            ok = parsed.notna().all(axis=1)
+            for column in parsed:
+                normalized[column] = parsed[column]
+        else:
+            ok = parsed.notna()
+            normalized[field] = parsed
+        failed = values.notna() & ~ok
+        report[field] = {'present': int(values.notna().sum()), 'parsed': int((values.notna() & ok).sum()),
+                         'failed': int(failed.sum())}
+        failures[field] = values[failed]
+    return normalized, report, failures
+
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    # Raw text, "Not Available" included, a chunk at a time so memory stays flat on very large files
+    if path.endswith(".jsonl"):
+        return pd.read_json(path, lines=True, dtype=False, chunksize=chunk_rows)
+    return pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+
+
+def normalized_path(path):
+    # product_data.csv -> product_data.normalized.csv
+    return os.path.splitext(path)[0] + ".normalized.csv"
+
+
+def normalize_file(path, output_path=None, samples=5):
+    output_path = output_path or normalized_path(path)
+    totals = {}
+    examples = {}
+    for i, chunk in enumerate(read_chunks(path)):
+        normalized, report, failures = normalize_frame(chunk)
+        normalized.to_csv(output_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        for field, counts in report.items():
+            total = totals.setdefault(field, dict.fromkeys(counts, 0))
+            for name, count in counts.items():
+                total[name] += count
+            examples.setdefault(field, [])
+            examples[field] += failures[field].drop_duplicates().head(samples - len(examples[field])).tolist()
+    return output_path, totals, examples
+
+
+def print_report(path, totals, examples):
+    print(f"Parse report for {path}:")
+    for field, counts in totals.items():
+        rate = counts['parsed'] / counts['present'] if counts['present'] else 1
+        print(f"  {field:<18} {counts['present']:>9} present {counts['parsed']:>9} parsed "
+              f"{counts['failed']:>7} failed ({rate:.1%})")
+        for value in examples[field]:
+            print(f"      unparsed: {value!r}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Normalize the prices, counts, weights, dimensions and wattage "
+                                                 "of scraped CSV or JSON Lines files.")
+    parser.add_argument("paths", nargs="+", help="e.g. 'Air Fryer Product Data.csv' product_data.csv")
+    args = parser.parse_args()
+    for path in args.paths:
+        output_path, totals, examples = normalize_file(path)
+        print(f"{output_path} has been written successfully.")
+        print_report(path, totals, examples)
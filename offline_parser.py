@@ -0,0 +1,137 @@
+import re
+import asyncio
+import lxml.html
+
+NOT_AVAILABLE = "Not Available"
+
+
+def has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# XPath versions of the CSS selectors used by the live get_* functions
+PRODUCT_TITLE = '//*[@id="productTitle"]'
+BRAND_NAME = f'//*[@id="bylineInfo_feature_div"]//*[{has_class("a-link-normal")}]'
+STAR_RATING = f'//*[{has_class("a-icon-alt")}]'
+NO_REVIEWS = '//*[@id="averageCustomerReviews"]//*[@id="acrNoReviewText"]'
+NUM_REVIEWS = '//*[@id="acrCustomerReviewLink"]//*[@id="acrCustomerReviewText"]'
+MRP_PRICE = f'//*[{has_class("a-price")} and {has_class("a-text-price")}]'
+SALE_PRICE = f'//*[{has_class("a-price-whole")}]'
+TECH_SPEC_ROWS = '//*[@id="productDetails_techSpec_section_1"]//tr'
+BEST_SELLERS_RANK = "//tr/th[contains(., 'Best Sellers Rank')]/following-sibling::*[1][self::td]"
+BULLET_POINTS = f'//*[@id="feature-bullets"]//ul[{has_class("a-vertical")}]//li'
+
+
+def product_overview(name):
+    return f'//*[{has_class("po-" + name)}]//*[{has_class("a-span9")}]'
+
+
+def first_text(tree, xpath):
+    # Equivalent of (await page.query_selector(selector)).text_content(), None when nothing matches
+    elements = tree.xpath(xpath)
+    return elements[0].text_content() if elements else None
+
+
+def get_product_name(tree):
+    product_name = first_text(tree, PRODUCT_TITLE)
+    return product_name.strip() if product_name is not None else NOT_AVAILABLE
+
+
+def get_brand_name(tree):
+    brand_name = first_text(tree, BRAND_NAME)
+    return re.sub(r'Visit|the|Store|Brand:', '', brand_name).strip() if brand_name is not None else NOT_AVAILABLE
+
+
+def get_star_rating(tree):
+    star_rating = first_text(tree, STAR_RATING)
+    if star_rating is not None:
+        return star_rating.strip().split(" ")[0]
+    no_reviews = first_text(tree, NO_REVIEWS)
+    return no_reviews.strip() if no_reviews is not None else NOT_AVAILABLE
+
+
+def get_num_reviews(tree):
+    num_reviews = first_text(tree, NUM_REVIEWS)
+    if num_reviews is not None:
+        return num_reviews.strip().split(" ")[0]
+    no_reviews = first_text(tree, NO_REVIEWS)
+    return no_reviews.strip() if no_reviews is not None else NOT_AVAILABLE
+
+
+def get_MRP(tree):
+    MRP = first_text(tree, MRP_PRICE)
+    if MRP is None or "₹" not in MRP:
+        return NOT_AVAILABLE
+    return MRP.split("₹")[1]
+
+
+def get_sale_price(tree):
+    sale_price = first_text(tree, SALE_PRICE)
+    return sale_price if sale_price is not None else NOT_AVAILABLE
+
+
+def get_technical_details(tree):
+    rows = tree.xpath(TECH_SPEC_ROWS)
+    if not rows:
+        return {}, NOT_AVAILABLE, NOT_AVAILABLE, NOT_AVAILABLE, NOT_AVAILABLE
+
+    technical_details = {}
+    for row in rows:
+        key_elements = row.xpath('.//th')
+        value_elements = row.xpath('.//td')
+        if not key_elements or not value_elements:
+            continue
+        value = value_elements[0].text_content().strip().replace('\u200e', '')
+        technical_details[key_elements[0].text_content().strip()] = value
+
+    # Fall back to the product overview block when the spec table has no (useful) value
+    colour = technical_details.get('Colour', NOT_AVAILABLE)
+    if colour == NOT_AVAILABLE:
+        colour = (first_text(tree, product_overview('color')) or NOT_AVAILABLE).strip()
+
+    capacity = technical_details.get('Capacity', NOT_AVAILABLE)
+    if capacity in (NOT_AVAILABLE, 'default'):
+        capacity = (first_text(tree, product_overview('capacity')) or capacity).strip()
+
+    wattage = technical_details.get('Wattage', NOT_AVAILABLE)
+    if wattage in (NOT_AVAILABLE, 'default'):
+        wattage = (first_text(tree, product_overview('wattage')) or wattage).strip()
+
+    country_of_origin = technical_details.get('Country of Origin', NOT_AVAILABLE)
+    return technical_details, colour, capacity, wattage, country_of_origin
+
+
+def get_best_sellers_rank(tree):
+    best_sellers_rank = first_text(tree, BEST_SELLERS_RANK)
+    if best_sellers_rank is None:
+        return NOT_AVAILABLE, NOT_AVAILABLE
+
+    home_kitchen_rank = ""
+    air_fryers_rank = ""
+    for rank in best_sellers_rank.split("#")[1:]:
+        if "in Home & Kitchen" in rank:
+            home_kitchen_rank = rank.split(" ")[0].replace(",", "")
+        else:
+            # Same as the live getter, whose `elif "in Air Fryers" or ...` is always true: the last rank outside
+            # Home & Kitchen is the one reported
+            air_fryers_rank = rank.split(" ")[0].replace(",", "")
+    return home_kitchen_rank, air_fryers_rank
+
+
+def get_bullet_points(tree):
+    return [li.text_content().strip() for li in tree.xpath(BULLET_POINTS)]
+
+
+def parse_product_html(html):
+    # Runs in a worker process: everything the live getters read, from a page.content() snapshot
+    tree = lxml.html.fromstring(html)
+    technical_details, colour, capacity, wattage, country_of_origin = get_technical_details(tree)
+    home_kitchen_rank, air_fryers_rank = get_best_sellers_rank(tree)
+    return (get_product_name(tree), get_brand_name(tree), get_star_rating(tree), get_num_reviews(tree),
+            get_MRP(tree), get_sale_price(tree), colour, capacity, wattage, country_of_origin,
+            home_kitchen_rank, air_fryers_rank, technical_details, get_bullet_points(tree))
+
+
+async def parse_in_pool(executor, html):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, parse_product_html, html)
@@ -0,0 +1,91 @@
+import os
+import csv
+import json
+
+from config import OUTPUT_BATCH_SIZE, OUTPUT_FORMAT
+from metrics import METRICS
+
+
+def json_value(value):
+    # Technical details records go to JSON as objects, anything else JSON has no type for as its text
+    return value.to_dict() if hasattr(value, "to_dict") else str(value)
+
+
+def staging_format(output_format=OUTPUT_FORMAT):
+    # Shard and worker files are merged row by row afterwards, so columnar output is staged as JSON Lines
+    return "jsonl" if output_format == "parquet" else output_format
+
+
+class OutputSink:
+    # Writes rows to CSV, JSON Lines or Parquet as they arrive, so memory stays flat and a crash keeps what was scraped
+    def __init__(self, path, columns, output_format=OUTPUT_FORMAT, batch_size=OUTPUT_BATCH_SIZE, append=False,
+                 on_flush=None):
+        self.path = os.path.splitext(path)[0] + "." + output_format
+        self.columns = list(columns)
+        self.output_format = output_format
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self.batch = []
+        self.keys = []
+        # Called with the keys of the rows of every batch once they are on disk
+        self.on_flush = on_flush
+        self.closed = False
+
+        if output_format == "parquet":
+            # Typed columns in a date-partitioned dataset directory instead of one text file
+            from columnar_output import ParquetDataset
+
+            self.dataset = ParquetDataset(self.path, self.columns, append=append)
+            self.file = None
+            return
+        write_header = not (append and os.path.exists(self.path) and os.path.getsize(self.path) > 0)
+        self.file = open(self.path, "a" if append else "w", newline="", encoding="utf-8")
+        if output_format == "csv":
+            self.writer = csv.writer(self.file)
+            if write_header:
+                self.writer.writerow(self.columns)
+        elif output_format != "jsonl":
+            raise ValueError(f"Unknown output format: {output_format}")
+
+    def write(self, row, key=None):
+        self.batch.append(row)
+        self.keys.append(key)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        with METRICS.span("output_flush_seconds", format=self.output_format):
+            if self.output_format == "parquet":
+                if self.batch:
+                    self.dataset.write(self.batch)
+            elif self.output_format == "csv":
+                # csv writes lists and dicts with str(), the same text DataFrame.to_csv produced
+                self.writer.writerows(self.batch)
+            else:
+                for row in self.batch:
+                    record = dict(zip(self.columns, row))
+                    self.file.write(json.dumps(record, ensure_ascii=False, default=json_value) + "\n")
+            if self.file:
+                self.file.flush()
+        METRICS.increment("output_rows_total", len(self.batch))
+        self.rows_written += len(self.batch)
+        if self.on_flush and self.keys:
+            self.on_flush(self.keys)
+        self.batch = []
+        self.keys = []
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        if self.file:
+            self.file.close()
+        else:
+            self.dataset.compact()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,155 @@
+import asyncio
+
+from config import BROWSER_MAX_RSS_MB, CONTEXT_MAX_NAVIGATIONS, CONTEXT_SPARES
+from metrics import METRICS
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Browser memory is only measured every this many navigations, a process walk is not free
+RSS_CHECK_INTERVAL = 10
+
+
+def browser_rss():
+    # Resident memory of everything this process started: the Playwright driver and the browser processes
+    total = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+
+class PageSlot:
+    def __init__(self, context, page, generation):
+        self.context = context
+        self.page = page
+        self.generation = generation
+        self.navigations = 0
+
+
+class PagePool:
+    # Hands every crawl worker a page in its own browser context and swaps it for a fresh one after
+    # max_navigations pages, or for every worker once the browser's RSS goes over max_rss_mb. Replacements are
+    # opened in the background shortly before they are needed and old contexts are closed in the background,
+    # so a worker never waits for a browser context to start or shut down.
+    def __init__(self, browser, setup_page=None, max_navigations=CONTEXT_MAX_NAVIGATIONS,
+                 max_rss_mb=BROWSER_MAX_RSS_MB, spares=CONTEXT_SPARES, workers=1):
+        self.browser = browser
+        self.setup_page = setup_page
+        self.max_navigations = max_navigations
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024 if psutil else 0
+        # One spare per worker by default, so every worker that recycles finds a context ready
+        self.spares = spares or workers
+        # A recording/replaying HAR context cannot open contexts of its own, only pages in itself
+        self.own_contexts = hasattr(browser, "new_context")
+        self.generation = 0
+        self.navigations_since_rss_check = 0
+        self.warm = []
+        self.idle = []
+        self.warming = set()
+        self.closing = set()
+
+    async def new_slot(self):
+        if self.own_contexts:
+            context = await self.browser.new_context()
+            page = await context.new_page()
+        else:
+            context = None
+            page = await self.browser.new_page()
+        if self.setup_page:
+            await self.setup_page(page)
+        return PageSlot(context, page, self.generation)
+
+    async def open(self):
+        # A slot a finished crawl handed back, keeping its navigation count, then a spare, then a new one
+        while self.idle:
+            slot = self.idle.pop()
+            if slot.generation == self.generation:
+                return slot
+            self.retire(slot)
+        if self.warm:
+            return self.warm.pop()
+        return await self.new_slot()
+
+    def release(self, slot):
+        # The worker is done for now; a pool that outlives one crawl_products call hands the slot out again
+        if slot.generation < self.generation:
+            self.retire(slot)
+        else:
+            self.idle.append(slot)
+
+    def prewarm(self):
+        while len(self.warm) + len(self.warming) < self.spares:
+            task = asyncio.ensure_future(self.new_slot())
+            self.warming.add(task)
+            task.add_done_callback(self.warmed)
+
+    def warmed(self, task):
+        self.warming.discard(task)
+        if task.cancelled() or task.exception():
+            return
+        slot = task.result()
+        # Opened before the last memory recycle or not, a context that has not loaded a page yet holds no memory
+        slot.generation = self.generation
+        self.warm.append(slot)
+
+    def retire(self, slot):
+        task = asyncio.ensure_future(self.close_slot(slot))
+        self.closing.add(task)
+        task.add_done_callback(self.closing.discard)
+
+    async def close_slot(self, slot):
+        try:
+            await (slot.context or slot.page).close()
+        except Exception:
+            pass
+
+    def over_memory(self):
+        if not self.max_rss_bytes:
+            return False
+        self.navigations_since_rss_check += 1
+        if self.navigations_since_rss_check < RSS_CHECK_INTERVAL:
+            return False
+        self.navigations_since_rss_check = 0
+        rss = browser_rss()
+        METRICS.set_gauge("browser_rss_bytes", rss)
+        return rss > self.max_rss_bytes
+
+    async def after_navigation(self, slot):
+        # The slot the worker should use for its next link
+        slot.navigations += 1
+        if self.over_memory():
+            # Every slot in use now is recycled on its next return, not just the one that noticed. The spares have
+            # not loaded anything yet, they move to the new generation and are topped up for the other workers.
+            self.generation += 1
+            for spare in self.warm:
+                spare.generation = self.generation
+            self.prewarm()
+            METRICS.increment("page_pool_memory_recycles_total")
+        if slot.generation < self.generation:
+            reason = "memory"
+        elif self.max_navigations and slot.navigations >= self.max_navigations:
+            reason = "navigations"
+        else:
+            if self.max_navigations and slot.navigations >= self.max_navigations * 0.8:
+                self.prewarm()
+            return slot
+        METRICS.increment("page_pool_recycles_total", reason=reason)
+        self.retire(slot)
+        replacement = await self.open()
+        self.prewarm()
+        return replacement
+
+    async def close(self):
+        for task in self.warming:
+            task.cancel()
+        await asyncio.gather(*self.warming, return_exceptions=True)
+        for slot in self.warm + self.idle:
+            self.retire(slot)
+        self.warm = []
+        self.idle = []
+        await asyncio.gather(*self.closing, return_exceptions=True)
@@ -0,0 +1,30 @@
+from har_archive import close_context, har_path, open_context
+from resource_blocking import ResourceBlocker
+from response_cache import ResponseCache
+
+
+class PageSetup:
+    # What every scraper and launcher does to a new page before it navigates: abort images, fonts, media, ads and
+    # trackers, then serve documents from the on-disk page cache. With an output path it also opens the context
+    # the pages come from, which records to or replays from a HAR archive when SCRAPER_HAR_MODE is set.
+    def __init__(self, output_path=None):
+        self.blocker = ResourceBlocker()
+        self.cache = ResponseCache()
+        self.har_path = har_path(output_path) if output_path else None
+
+    async def __call__(self, page):
+        # Registered after the blocker, so the cache's route runs first
+        await self.blocker.install(page)
+        await self.cache.install(page)
+
+    async def open_context(self, browser):
+        return await open_context(browser, self.har_path) if self.har_path else browser
+
+    async def close_context(self, browser, context):
+        if self.har_path:
+            await close_context(browser, context, self.har_path)
+
+    def print_summary(self):
+        # How many requests and bytes the blocking profile and the page cache saved
+        self.blocker.print_summary()
+        self.cache.print_summary()
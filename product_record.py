@@ -0,0 +1,98 @@
+import re
+import sys
+
+# Shorter strings (brands, colours, ratings, spec values like "1500 Watts") repeat across products and are interned
+INTERN_MAX_LENGTH = 64
+
+# Every distinct tuple of spec table keys is kept once and shared by all the products with that table layout
+KEY_SETS = {}
+
+
+def field_name(column):
+    # 'Product Link' -> 'product_link', 'MRP' -> 'mrp'
+    return re.sub(r"\W+", "_", column.strip()).strip("_").lower()
+
+
+def intern_short(value):
+    # The page hands back a new string every time, keep one shared copy of the repeated ones
+    if isinstance(value, str) and len(value) <= INTERN_MAX_LENGTH:
+        return sys.intern(value)
+    return value
+
+
+class TechSpecs:
+    # The technical details table of one product as a shared, interned key tuple and a tuple of values, instead of
+    # a dict with its own hash table and key strings. Reads like a dict and prints like one, so the CSV text is
+    # unchanged.
+    __slots__ = ("keys", "values")
+
+    def __init__(self, pairs):
+        pairs = list(pairs)
+        keys = tuple(sys.intern(key) for key, _ in pairs)
+        self.keys = KEY_SETS.setdefault(keys, keys)
+        self.values = tuple(map(intern_short, (value for _, value in pairs)))
+
+    def items(self):
+        return zip(self.keys, self.values)
+
+    def get(self, key, default=None):
+        try:
+            return self.values[self.keys.index(key)]
+        except ValueError:
+            return default
+
+    def __getitem__(self, key):
+        try:
+            return self.values[self.keys.index(key)]
+        except ValueError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __eq__(self, other):
+        return dict(self.items()) == (dict(other.items()) if hasattr(other, "items") else other)
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+class ProductRecord:
+    # Base of the record types made by record_type(): one slot per output column and no per-instance dict.
+    # A record iterates and indexes in column order, so it goes to the CSV writer and the Arrow table as it is.
+    __slots__ = ()
+
+    def __init__(self, *values):
+        if len(values) != len(self.__slots__):
+            raise TypeError(f"{type(self).__name__} takes {len(self.__slots__)} values, got {len(values)}")
+        for name, value in zip(self.__slots__, values):
+            if isinstance(value, dict):
+                value = TechSpecs(value.items())
+            else:
+                value = intern_short(value)
+            setattr(self, name, value)
+
+    def __iter__(self):
+        return (getattr(self, name) for name in self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __getitem__(self, index):
+        return getattr(self, self.__slots__[index])
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(map(repr, self))})"
+
+
+def record_type(columns, name="ProductRecord"):
+    return type(name, (ProductRecord,), {"__slots__": tuple(map(field_name, columns))})
@@ -0,0 +1,99 @@
+import time
+import asyncio
+from urllib.parse import urlsplit
+
+from config import RATE_BURST, RATE_DECREASE, RATE_INCREASE, RATE_INITIAL, RATE_MAX, RATE_MIN
+from metrics import METRICS
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.last_decrease = 0
+        # Waiters queue on the lock, so pages get their turn in the order they asked
+        self.lock = asyncio.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def take(self):
+        async with self.lock:
+            self.refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self.refill()
+            self.tokens -= 1
+
+
+class AimdRateLimiter:
+    # One token bucket per host in front of every navigation. Healthy responses raise the host's rate by about
+    # `increase` requests/s per second of traffic, a 503, robot check or timeout multiplies it by `decrease`.
+    def __init__(self, initial=RATE_INITIAL, minimum=RATE_MIN, maximum=RATE_MAX, increase=RATE_INCREASE,
+                 decrease=RATE_DECREASE, burst=RATE_BURST):
+        self.enabled = initial > 0
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.burst = burst
+        self.buckets = {}
+
+    def share(self, parts):
+        # This process is one of `parts` crawling the same hosts: scale every rate and the burst so their sums stay
+        # the same (a bucket still needs room for one whole token)
+        self.initial /= parts
+        self.minimum /= parts
+        self.maximum /= parts
+        self.increase /= parts
+        self.burst = max(1, self.burst / parts)
+
+    def bucket(self, url):
+        host = urlsplit(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.initial, self.burst)
+            self.publish(host)
+        return host, self.buckets[host]
+
+    def publish(self, host):
+        METRICS.set_gauge("rate_limit_requests_per_second", round(self.buckets[host].rate, 3), host=host)
+
+    async def acquire(self, url):
+        if not self.enabled:
+            return
+        host, bucket = self.bucket(url)
+        start = time.perf_counter()
+        await bucket.take()
+        METRICS.increment("rate_limit_wait_seconds_total", time.perf_counter() - start, host=host)
+
+    def record_success(self, url):
+        if not self.enabled:
+            return
+        host, bucket = self.bucket(url)
+        bucket.refill()
+        # Spread over the requests of one second, so the rate grows by `increase` per second, not per request
+        bucket.rate = min(self.maximum, bucket.rate + self.increase / bucket.rate)
+        self.publish(host)
+
+    def record_congestion(self, url):
+        if not self.enabled:
+            return
+        host, bucket = self.bucket(url)
+        now = time.monotonic()
+        # Concurrent pages all see the same overload; only cut the rate once per second for it
+        if now - bucket.last_decrease < 1:
+            return
+        bucket.refill()
+        bucket.rate = max(self.minimum, bucket.rate * self.decrease)
+        bucket.last_decrease = now
+        METRICS.increment("rate_limit_decreases_total", host=host)
+        self.publish(host)
+
+
+# One limiter per process, shared by every page and the HTTP fetcher
+RATE_LIMITER = AimdRateLimiter()
@@ -0,0 +1,57 @@
+from collections import Counter
+
+from config import BLOCK_RESOURCE_TYPES, BLOCK_URL_PATTERNS
+
+# Rough average transfer size per resource type, used to estimate the bytes saved by aborting a request
+ESTIMATED_BYTES = {"image": 40_000, "media": 500_000, "font": 60_000, "stylesheet": 30_000, "script": 50_000,
+                   "xhr": 5_000, "fetch": 5_000, "other": 5_000}
+
+
+class ResourceBlocker:
+    def __init__(self, resource_types=BLOCK_RESOURCE_TYPES, url_patterns=BLOCK_URL_PATTERNS):
+        self.resource_types = set(resource_types)
+        self.url_patterns = list(url_patterns)
+        self.blocked = Counter()
+        self.allowed_requests = 0
+        self.downloaded_bytes = 0
+
+    def should_block(self, request):
+        if request.resource_type == "document":
+            return False
+        return request.resource_type in self.resource_types or any(
+            pattern in request.url for pattern in self.url_patterns)
+
+    async def handle_route(self, route):
+        if self.should_block(route.request):
+            self.blocked[route.request.resource_type] += 1
+            await route.abort()
+        else:
+            self.allowed_requests += 1
+            # Let other route handlers (e.g. the response cache) see the request before it goes out
+            await route.fallback()
+
+    def record_response(self, response):
+        try:
+            self.downloaded_bytes += int(response.headers.get("content-length", 0))
+        except ValueError:
+            pass
+
+    async def install(self, page):
+        # Every request of the page goes through handle_route before it leaves the browser
+        await page.route("**/*", self.handle_route)
+        page.on("response", self.record_response)
+
+    def summary(self):
+        blocked_requests = sum(self.blocked.values())
+        saved_bytes = sum(ESTIMATED_BYTES.get(kind, 5_000) * count for kind, count in self.blocked.items())
+        return {"blocked_requests": blocked_requests, "allowed_requests": self.allowed_requests,
+                "blocked_by_type": dict(self.blocked), "estimated_bytes_saved": saved_bytes,
+                "downloaded_bytes": self.downloaded_bytes}
+
+    def print_summary(self):
+        summary = self.summary()
+        print(f"Blocked {summary['blocked_requests']} of "
+              f"{summary['blocked_requests'] + summary['allowed_requests']} requests "
+              f"({', '.join(f'{kind}: {count}' for kind, count in self.blocked.most_common()) or 'none'}), "
+              f"saved ~{summary['estimated_bytes_saved'] / 1_000_000:.1f} MB, "
+              f"downloaded {summary['downloaded_bytes'] / 1_000_000:.1f} MB.")
@@ -0,0 +1,158 @@
+import os
+import json
+import gzip
+import time
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from asin_index import canonical_product_url, extract_asin
+from config import CACHE_DIR, CACHE_MAX_BYTES, CACHE_TTL_PRODUCT, CACHE_TTL_SEARCH
+from navigation import PAGE_CACHES, looks_blocked
+
+# Query parameters that change what a search page shows; everything else (crid, sprefix, qid, ref, ...) is tracking
+SEARCH_PARAMS = ("k", "i", "rh", "s", "page")
+
+# route.fetch() fails with Node's socket errors; the page's navigation is aborted with the matching network error
+# so retry_policy.classify still sees a DNS or connection failure rather than a navigation timeout
+ABORT_CODES = (("ENOTFOUND", "namenotresolved"), ("EAI_AGAIN", "namenotresolved"),
+               ("ECONNREFUSED", "connectionrefused"), ("ECONNRESET", "connectionreset"),
+               ("EHOSTUNREACH", "addressunreachable"), ("ENETUNREACH", "internetdisconnected"),
+               ("Timeout", "timedout"))
+
+
+def page_type(url):
+    return "search" if urlsplit(url).path == "/s" else "product"
+
+
+def abort_code(error):
+    message = str(error)
+    return next((code for marker, code in ABORT_CODES if marker in message), "failed")
+
+
+def cache_key(url):
+    # Canonical form of a URL, so the same page is cached once whatever tracking parameters it carries
+    if extract_asin(url):
+        # Also covers sponsored /sspa/click links, which carry the product path in their url= parameter
+        return canonical_product_url(url)
+    parts = urlsplit(url)
+    if parts.path == "/s":
+        query = sorted((key, value) for key, value in parse_qsl(parts.query) if key in SEARCH_PARAMS)
+        return f"https://{parts.netloc.lower()}/s?{urlencode(query)}"
+    return f"https://{parts.netloc.lower()}{parts.path}?{parts.query}"
+
+
+class ResponseCache:
+    def __init__(self, directory=CACHE_DIR, ttl_search=CACHE_TTL_SEARCH, ttl_product=CACHE_TTL_PRODUCT,
+                 max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.enabled = bool(directory)
+        self.ttl = {"search": ttl_search, "product": ttl_product}
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.stores = self.evictions = 0
+        self.total_bytes = 0
+        if self.enabled:
+            os.makedirs(directory, exist_ok=True)
+            self.total_bytes = sum(os.path.getsize(path) for path in self.entries())
+
+    def entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".gz"):
+                    yield os.path.join(root, name)
+
+    def entry_path(self, url):
+        digest = hashlib.sha256(cache_key(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + ".gz")
+
+    def get(self, url):
+        # (status, headers, body) of a fresh cached response, or None
+        if not self.enabled:
+            return None
+        path = self.entry_path(url)
+        try:
+            with gzip.open(path, "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if time.time() - meta["stored_at"] > self.ttl[page_type(url)]:
+            self.misses += 1
+            return None
+        # Touch the entry so eviction drops the least recently used pages first
+        os.utime(path)
+        self.hits += 1
+        return meta["status"], meta["headers"], body
+
+    def fresh(self, url):
+        # Whether a request for url would be answered from disk, without counting a hit or touching the entry
+        if not self.enabled:
+            return False
+        try:
+            with gzip.open(self.entry_path(url), "rb") as f:
+                meta = json.loads(f.readline())
+        except (OSError, ValueError):
+            return False
+        return time.time() - meta["stored_at"] <= self.ttl[page_type(url)]
+
+    def put(self, url, status, headers, body):
+        if not self.enabled or status != 200 or looks_blocked(body.decode("utf-8", "replace")):
+            return
+        path = self.entry_path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        meta = {"url": cache_key(url), "stored_at": time.time(), "status": status,
+                "headers": {"content-type": headers.get("content-type", "text/html; charset=utf-8")}}
+        previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+        with gzip.open(path + ".tmp", "wb", compresslevel=6) as f:
+            f.write(json.dumps(meta).encode("utf-8") + b"\n")
+            f.write(body)
+        os.replace(path + ".tmp", path)
+        self.stores += 1
+        self.total_bytes += os.path.getsize(path) - previous_size
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        # Drop least recently used entries until the cache is back under 90% of its size limit
+        entries = sorted(self.entries(), key=os.path.getmtime)
+        for path in entries:
+            if self.total_bytes <= self.max_bytes * 0.9:
+                break
+            self.total_bytes -= os.path.getsize(path)
+            os.remove(path)
+            self.evictions += 1
+
+    async def handle_route(self, route):
+        request = route.request
+        if request.resource_type != "document" or request.method != "GET":
+            await route.fallback()
+            return
+        cached = self.get(request.url)
+        if cached:
+            status, headers, body = cached
+            await route.fulfill(status=status, headers=headers, body=body)
+            return
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception as error:
+            # Left unanswered, the request would hang until the navigation timeout
+            await route.abort(abort_code(error))
+            return
+        self.put(request.url, response.status, response.headers, body)
+        await route.fulfill(response=response, body=body)
+
+    async def install(self, page):
+        # Registered after the resource blocker, so documents are served from disk before anything else runs
+        if self.enabled:
+            await page.route("**/*", self.handle_route)
+            # Navigations served from here skip the host's rate limit
+            PAGE_CACHES[page] = self
+
+    def print_summary(self):
+        if not self.enabled:
+            return
+        lookups = self.hits + self.misses
+        print(f"Page cache: {self.hits} hits, {self.misses} misses"
+              f"{f' ({self.hits / lookups:.0%} hit rate)' if lookups else ''}, {self.stores} stored, "
+              f"{self.evictions} evicted, {self.total_bytes / 1_000_000:.1f} MB on disk.")
@@ -0,0 +1,157 @@
+import time
+import random
+import asyncio
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from config import (BREAKER_COOLDOWN, BREAKER_MAX_COOLDOWN, BREAKER_THRESHOLD, RETRY_BASE_DELAY,
+                    RETRY_BUDGET_MIN, RETRY_BUDGET_RATIO, RETRY_MAX_ATTEMPTS, RETRY_MAX_DELAY)
+from metrics import METRICS
+
+# Chromium (net::ERR_*) and Firefox (NS_ERROR_*) messages of failures that never reached the server
+DNS_ERRORS = ("ERR_NAME_NOT_RESOLVED", "ERR_NAME_RESOLUTION_FAILED", "NS_ERROR_UNKNOWN_HOST")
+CONNECTION_ERRORS = ("ERR_CONNECTION_", "ERR_INTERNET_DISCONNECTED", "ERR_NETWORK_CHANGED", "ERR_ADDRESS_UNREACHABLE",
+                     "ERR_EMPTY_RESPONSE", "NS_ERROR_CONNECTION_REFUSED", "NS_ERROR_NET_RESET", "NS_ERROR_NET_INTERRUPT",
+                     "NS_ERROR_OFFLINE")
+
+# Failure kinds that mean the host is pushing back; enough of them in a row pause the whole crawl
+THROTTLE_KINDS = ("throttled", "robot_check")
+# Failure kinds that lower the host's rate limit
+CONGESTION_KINDS = (*THROTTLE_KINDS, "timeout")
+
+# How many attempts each kind of failure gets (None = RETRY_MAX_ATTEMPTS). A 404 or a page that loads without its
+# content will not change by asking again, and a DNS failure that survives a couple of backoffs is a local network
+# problem, not a flaky page.
+MAX_ATTEMPTS_BY_KIND = {"client_error": 1, "dns": 3, "missing_content": 1}
+
+
+class HttpStatusError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class RobotCheckError(Exception):
+    def __init__(self):
+        super().__init__("Amazon robot check page")
+
+
+class MissingContentError(Exception):
+    # The page loaded fine but has no readiness anchor and is not a robot check: a delisted product, a variant
+    # page without a title, a different layout. Asking again gives the same page, and the host is not overloaded.
+    def __init__(self, selector):
+        super().__init__(f"page loaded without {selector}")
+        self.selector = selector
+
+
+class NavigationError(Exception):
+    # Raised by perform_request_with_retry once a URL is given up on
+    def __init__(self, kind, url, attempts):
+        super().__init__(f"{kind} after {attempts} attempt{'s' if attempts > 1 else ''}: {url}")
+        self.kind = kind
+        self.url = url
+        self.attempts = attempts
+
+
+def classify(error):
+    if isinstance(error, RobotCheckError):
+        return "robot_check"
+    if isinstance(error, MissingContentError):
+        return "missing_content"
+    if isinstance(error, HttpStatusError):
+        if error.status in (429, 503):
+            return "throttled"
+        return "server_error" if error.status >= 500 else "client_error"
+    if isinstance(error, (PlaywrightTimeoutError, asyncio.TimeoutError)):
+        return "timeout"
+    message = str(error)
+    if any(code in message for code in DNS_ERRORS):
+        return "dns"
+    if any(code in message for code in CONNECTION_ERRORS):
+        return "connection"
+    return "other"
+
+
+class RetryBudget:
+    # Retries may add at most `ratio` extra requests per request made, plus a fixed allowance for the start of a
+    # crawl, so a host that fails everything gets a bounded number of retries instead of attempts x links
+    def __init__(self, ratio=RETRY_BUDGET_RATIO, minimum=RETRY_BUDGET_MIN):
+        self.ratio = ratio
+        self.minimum = minimum
+        self.requests = 0
+        self.retries = 0
+
+    def record_request(self):
+        self.requests += 1
+
+    def try_spend(self):
+        if self.retries >= self.minimum + self.ratio * self.requests:
+            return False
+        self.retries += 1
+        return True
+
+
+class CircuitBreaker:
+    # Opens after `threshold` throttling signals in a row and holds every navigation for the cooldown,
+    # which doubles with each trip that is not followed by a successful request
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN, max_cooldown=BREAKER_MAX_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.consecutive_throttles = 0
+        self.trips = 0
+        self.open_until = 0
+
+    def record_success(self):
+        self.consecutive_throttles = 0
+        self.trips = 0
+
+    def record_throttle(self):
+        self.consecutive_throttles += 1
+        if self.consecutive_throttles < self.threshold or time.monotonic() < self.open_until:
+            return
+        pause = min(self.max_cooldown, self.cooldown * 2 ** self.trips)
+        self.trips += 1
+        self.consecutive_throttles = 0
+        self.open_until = time.monotonic() + pause
+        METRICS.increment("circuit_breaker_trips_total")
+        print(f"Host is throttling, pausing the crawl for {pause:.0f} seconds.")
+
+    async def wait(self):
+        while (remaining := self.open_until - time.monotonic()) > 0:
+            METRICS.set_gauge("circuit_breaker_open", 1)
+            await asyncio.sleep(remaining)
+        METRICS.set_gauge("circuit_breaker_open", 0)
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts=RETRY_MAX_ATTEMPTS, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY,
+                 budget=None, breaker=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+        self.breaker = breaker or CircuitBreaker()
+
+    async def before_request(self):
+        await self.breaker.wait()
+        self.budget.record_request()
+
+    def record_success(self):
+        self.breaker.record_success()
+
+    def next_delay(self, kind, attempt):
+        # Seconds to wait before the next attempt, or None to give up on the URL
+        if kind in THROTTLE_KINDS:
+            self.breaker.record_throttle()
+        if attempt >= MAX_ATTEMPTS_BY_KIND.get(kind, self.max_attempts):
+            return None
+        if not self.budget.try_spend():
+            METRICS.increment("retry_budget_exhausted_total")
+            return None
+        # Exponential backoff with full jitter, so concurrent workers do not retry in lockstep
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+# One policy per process: the budget and the breaker cover every page of the crawl
+RETRY_POLICY = RetryPolicy()
@@ -0,0 +1,9 @@
+import importlib.util
+
+
+def load_script(path, name):
+    # The scrapers have spaces in their file names, so they are loaded by path rather than imported
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
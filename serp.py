@@ -0,0 +1,87 @@
+import time
+from urllib.parse import urlencode, urljoin, parse_qsl, urlsplit, urlunsplit
+
+from asin_index import canonical_product_url, extract_asin
+from config import CONCURRENCY
+from crawl_pool import crawl_products
+from metrics import METRICS
+from navigation import SEARCH_READY_SELECTOR, perform_request_with_retry
+from serp_cards import extract_cards
+
+NEXT_BUTTON = "a.s-pagination-item.s-pagination-next.s-pagination-button.s-pagination-separator"
+MAX_SEARCH_PAGES = 50
+
+
+def search_page_url(search_url, page_number):
+    # Same search with &page=<n>, which is what the "next" button links to
+    parts = urlsplit(search_url)
+    query = [(key, value) for key, value in parse_qsl(parts.query) if key != "page"]
+    if page_number > 1:
+        query.append(("page", str(page_number)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+async def read_page_count(page):
+    # The pagination strip shows the last page number (e.g. "1 2 3 ... 20 Next")
+    labels = await page.eval_on_selector_all(".s-pagination-item", "items => items.map(item => item.textContent.trim())")
+    numbers = [int(label) for label in labels if label.isdigit()]
+    return max(numbers, default=1)
+
+
+def merge_links(pages):
+    # Every link reduced to /dp/<ASIN>, so a product listed twice (organic and sponsored, or with different
+    # ref= and qid= parameters) is only crawled once; first occurrence in page order wins
+    product_links = {}
+    for links in pages:
+        for link in links:
+            product_links.setdefault(canonical_product_url(link), None)
+    return list(product_links)
+
+
+async def collect_product_links(browser, page, extract_page_links, setup_page=None, concurrency=CONCURRENCY,
+                                cards=None):
+    # `page` is already on the first search results page. With a `cards` list, the result card of every returned
+    # product (title, prices, rating, reviews) is appended to it as well.
+    start = time.perf_counter()
+
+    async def extract_search_page(search_page):
+        if cards is not None:
+            cards.extend(await extract_cards(search_page))
+        return await extract_page_links(search_page)
+
+    first_page_links = await extract_search_page(page)
+    print(f"Scraped {len(first_page_links)} products.")
+    page_count = min(await read_page_count(page), MAX_SEARCH_PAGES)
+
+    if page_count > 1:
+        # Every results page is known up front, so fetch them all concurrently
+        async def scrape_search_page(search_page, url):
+            await perform_request_with_retry(search_page, url, SEARCH_READY_SELECTOR)
+            return await extract_search_page(search_page)
+
+        urls = [search_page_url(page.url, number) for number in range(2, page_count + 1)]
+        other_pages = await crawl_products(browser, urls, scrape_search_page, concurrency=concurrency,
+                                           setup_page=setup_page, report_progress=False)
+        product_links = merge_links([first_page_links, *other_pages])
+    else:
+        # No numbered pagination: follow the "next" links one page at a time
+        pages = [first_page_links]
+        page_count = 1
+        next_button = await page.query_selector(NEXT_BUTTON)
+        while next_button and page_count < MAX_SEARCH_PAGES:
+            next_url = urljoin(page.url, await next_button.get_attribute('href'))
+            await perform_request_with_retry(page, next_url, SEARCH_READY_SELECTOR)
+            pages.append(await extract_search_page(page))
+            page_count += 1
+            next_button = await page.query_selector(NEXT_BUTTON)
+        product_links = merge_links(pages)
+
+    if cards is not None:
+        # Only the products the scraper's own link filter kept (no accessories), so the card snapshot and the
+        # product crawl cover the same ASINs
+        kept = set(map(extract_asin, product_links))
+        cards[:] = [card for card in cards if card['asin'] in kept]
+    print(f"Finished scraping {len(product_links)} products from {page_count} search pages.")
+    METRICS.increment("search_pages_total", page_count)
+    METRICS.observe("search_discovery_seconds", time.perf_counter() - start)
+    return product_links
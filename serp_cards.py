@@ -0,0 +1,85 @@
+import datetime
+from urllib.parse import urlsplit
+
+from asin_index import canonical_product_url
+from output_sink import OutputSink
+
+NOT_AVAILABLE = "Not Available"
+
+# One page.evaluate for every result card of a search page: the raw text of each field, or null
+EXTRACT_CARDS_JS = """
+() => {
+    const text = (card, selectors) => {
+        for (const selector of selectors) {
+            const element = card.querySelector(selector);
+            if (element && element.textContent.trim()) return element.textContent.trim();
+        }
+        return null;
+    };
+    const cards = document.querySelectorAll('div[data-component-type="s-search-result"][data-asin]');
+    return Array.from(cards, (card) => {
+        const reviews = card.querySelector('span[aria-label] a[href*="customerReviews"] span, a[href*="customerReviews"] span');
+        return {
+            asin: card.getAttribute('data-asin'),
+            title: text(card, ['h2 a span', 'h2 span', 'h2']),
+            price: text(card, ['.a-price:not(.a-text-price) .a-offscreen']),
+            mrp: text(card, ['.a-price.a-text-price .a-offscreen']),
+            rating: text(card, ['.a-icon-alt']),
+            reviews: reviews ? reviews.textContent.trim() : null,
+            sponsored: card.classList.contains('AdHolder') || /\\bSponsored\\b/.test(text(card, ['.puis-sponsored-label-text', '.s-label-popover-default', 'span.a-color-secondary']) || ''),
+        };
+    }).filter((card) => card.asin);
+}
+"""
+
+# Column order of the card snapshot files
+CARD_COLUMNS = ['date', 'asin', 'product_url', 'product_name', 'sale_price', 'MRP', 'star_rating',
+                'number_of_reviews', 'sponsored']
+
+
+def card_path(output_path):
+    # product_data.csv -> product_data.cards.csv, so a card snapshot never overwrites a full product crawl
+    return output_path.rsplit(".", 1)[0] + ".cards.csv"
+
+
+def clean_card(raw, page_url):
+    host = urlsplit(page_url).netloc or "www.amazon.in"
+    return {
+        'asin': raw['asin'],
+        'product_url': canonical_product_url(f"https://{host}/dp/{raw['asin']}"),
+        'product_name': raw['title'] or NOT_AVAILABLE,
+        # "₹13,590" -> "13,590", the same text the product page getters return
+        'sale_price': raw['price'].replace("₹", "").strip() if raw['price'] else NOT_AVAILABLE,
+        'MRP': raw['mrp'].replace("₹", "").strip() if raw['mrp'] else NOT_AVAILABLE,
+        # "4.0 out of 5 stars" -> "4.0"
+        'star_rating': raw['rating'].split(" ")[0] if raw['rating'] else NOT_AVAILABLE,
+        'number_of_reviews': raw['reviews'].strip("()") if raw['reviews'] else NOT_AVAILABLE,
+        'sponsored': raw['sponsored'],
+    }
+
+
+async def extract_cards(page):
+    try:
+        raw_cards = await page.evaluate(EXTRACT_CARDS_JS)
+    except Exception:
+        return []
+    return [clean_card(raw, page.url) for raw in raw_cards]
+
+
+def merge_cards(cards):
+    # One record per ASIN, the first card in page order wins (an organic and a sponsored card for the same product)
+    merged = {}
+    for card in cards:
+        merged.setdefault(card['asin'], card)
+    return list(merged.values())
+
+
+async def write_card_snapshot(discover_product_links, output_path):
+    # Search pages only: every result card becomes a row, without loading a single product page
+    cards = []
+    await discover_product_links(cards=cards)
+    today = datetime.datetime.now().strftime("%Y-%m-%d")
+    with OutputSink(card_path(output_path), CARD_COLUMNS) as sink:
+        for card in merge_cards(cards):
+            sink.write([today, *(card[column] for column in CARD_COLUMNS[1:])], key=card['product_url'])
+    print(f'{sink.path} has been written successfully with {sink.rows_written} products.')
@@ -0,0 +1,145 @@
+import os
+import csv
+import json
+import time
+import asyncio
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from playwright.async_api import async_playwright
+
+from asin_index import canonical_product_url
+from crawl_pool import scrape_products
+from frontier import DONE, FAILED, Frontier
+from metrics import METRICS, metrics_path
+from navigation import SEARCH_READY_SELECTOR, perform_request_with_retry
+from output_sink import OutputSink, staging_format
+from page_setup import PageSetup
+from rate_limiter import RATE_LIMITER
+from script_loader import load_script
+
+
+def shard_path(output_path, shard):
+    # product_data.csv -> product_data.shard3.csv
+    base, extension = os.path.splitext(output_path)
+    return f"{base}.shard{shard}{extension}"
+
+
+def link_column(columns):
+    # Position of the product link in a scraper's rows ('Product Link', 'product_url', ...)
+    return next(i for i, column in enumerate(columns) if "link" in column.lower() or "url" in column.lower())
+
+
+def dedupe_links(links):
+    # One link per product, so no product is scraped by two shards
+    return list(dict.fromkeys(map(canonical_product_url, links)))
+
+
+async def open_browser(pw, script):
+    return await getattr(pw, getattr(script, "BROWSER_TYPE", "chromium")).launch()
+
+
+async def discover_links(script):
+    async with async_playwright() as pw:
+        browser = await open_browser(pw, script)
+        page = await browser.new_page()
+        setup_page = PageSetup()
+        await setup_page(page)
+        await perform_request_with_retry(page, script.SEARCH_URL, SEARCH_READY_SELECTOR)
+        # The scrapers call their link extraction either extract_product_links or get_product_urls
+        extract = getattr(script, "extract_product_links", None) or script.get_product_urls
+        links = await extract(browser, page, setup_page=setup_page)
+        await browser.close()
+    return dedupe_links(links)
+
+
+async def crawl_shard(script_path, shard, shards, links):
+    script = load_script(script_path, f"shard_{shard}_scraper")
+    # Every shard has its own rate limiter, together they stay within the configured limit for the host
+    RATE_LIMITER.share(shards)
+    frontier = Frontier(":memory:")
+    frontier.add(links)
+    start = time.perf_counter()
+    async with async_playwright() as pw:
+        browser = await open_browser(pw, script)
+        with OutputSink(shard_path(script.OUTPUT_FILE, shard), script.COLUMNS, output_format=staging_format(),
+                        on_flush=frontier.mark_done) as sink:
+            setup_page = PageSetup()
+            # The script's snapshot_row, where it has one, lets SCRAPER_PARSE_MODE / SCRAPER_FETCH_MODE apply here too
+            await scrape_products(browser, links, script.scrape_product, getattr(script, "snapshot_row", None),
+                                  cache=setup_page.cache, setup_page=setup_page, sink=sink, frontier=frontier,
+                                  report_progress=False)
+        await browser.close()
+    seconds = time.perf_counter() - start
+    METRICS.write(metrics_path(sink.path))
+    counts = frontier.counts()
+    return {"shard": shard, "links": len(links), "done": counts.get(DONE, 0), "failed": counts.get(FAILED, 0),
+            "seconds": seconds, "pages_per_second": counts.get(DONE, 0) / seconds if seconds else 0,
+            "output": sink.path}
+
+
+def run_shard(script_path, shard, shards, links):
+    # Entry point of a worker process: its own event loop, Playwright driver and browser
+    return asyncio.run(crawl_shard(script_path, shard, shards, links))
+
+
+def read_rows(path, columns):
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            yield from reader
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                yield [record.get(column) for column in columns]
+
+
+def merge_shards(script, shard_outputs):
+    # Concatenate the shard files into the scraper's usual output, keeping the first row of every product
+    key_index = link_column(script.COLUMNS)
+    seen = set()
+    duplicates = 0
+    with OutputSink(script.OUTPUT_FILE, script.COLUMNS) as sink:
+        for path in shard_outputs:
+            for row in read_rows(path, script.COLUMNS):
+                key = canonical_product_url(row[key_index])
+                if key in seen:
+                    duplicates += 1
+                    continue
+                seen.add(key)
+                sink.write(row)
+    for path in shard_outputs:
+        os.remove(path)
+    return sink, duplicates
+
+
+async def main(script_path, shards):
+    script = load_script(script_path, "scraper")
+    start = time.perf_counter()
+    links = await discover_links(script)
+    print(f"Sharding {len(links)} product links across {shards} processes.")
+
+    # spawn, not fork: every worker starts its own Playwright driver from a clean interpreter
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=shards, mp_context=multiprocessing.get_context("spawn")) as executor:
+        results = await asyncio.gather(*[
+            loop.run_in_executor(executor, run_shard, os.path.abspath(script_path), shard, shards, links[shard::shards])
+            for shard in range(shards)])
+
+    for result in results:
+        print(f"Shard {result['shard']}: {result['done']} of {result['links']} links in {result['seconds']:.1f} s "
+              f"({result['pages_per_second']:.2f} pages/s), {result['failed']} failed.")
+    sink, duplicates = merge_shards(script, [result["output"] for result in results])
+    seconds = time.perf_counter() - start
+    print(f"{sink.path} has been written successfully: {sink.rows_written} rows, {duplicates} duplicates dropped, "
+          f"{sink.rows_written / seconds:.2f} pages/s overall in {seconds:.1f} s.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Crawl one scraper's product links with several browser processes.")
+    parser.add_argument("script", help="path of the scraper script, e.g. 'Playwright- Air fryer data- scraping code.py'")
+    parser.add_argument("--shards", type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    args = parser.parse_args()
+    asyncio.run(main(args.script, args.shards))
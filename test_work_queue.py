@@ -0,0 +1,34 @@
+import pytest
+
+from work_queue import DONE, FAILED, QUEUED, FileWorkQueue, SqliteWorkQueue
+
+
+@pytest.fixture(params=["sqlite", "file"])
+def queue(request, tmp_path):
+    if request.param == "sqlite":
+        queue = SqliteWorkQueue(str(tmp_path / "crawl_queue.sqlite"), max_attempts=1)
+    else:
+        queue = FileWorkQueue(str(tmp_path / "crawl_queue"), max_attempts=1)
+    yield queue
+    queue.close()
+
+
+def finish_crawl(queue, urls):
+    queue.start_crawl()
+    queue.put(urls)
+    queue.set_discovered()
+    claimed = queue.claim("worker", len(urls))
+    queue.ack("worker", claimed[:-1])
+    queue.fail("worker", claimed[-1], "dead link")
+
+
+def test_next_crawl_queues_finished_links_again(queue):
+    urls = ["https://www.amazon.in/dp/B000000001", "https://www.amazon.in/dp/B000000002"]
+    finish_crawl(queue, urls)
+    assert queue.counts().get(DONE) == 1 and queue.counts().get(FAILED) == 1
+
+    queue.start_crawl()
+    assert not queue.discovered()
+    queue.put(urls)
+    assert queue.counts().get(QUEUED) == 2
+    assert sorted(queue.claim("worker", 10)) == urls
@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+from config import MAX_ATTEMPTS, QUEUE_LEASE_SECONDS
+
+QUEUED, LEASED, DONE, FAILED = "queued", "leased", "done", "failed"
+
+
+class SqliteWorkQueue:
+    # Work queue in one SQLite file: fine for several workers on one host, or on a filesystem with working locks
+    def __init__(self, path, lease_seconds=QUEUE_LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS tasks (
+                               url TEXT PRIMARY KEY,
+                               state TEXT NOT NULL,
+                               owner TEXT,
+                               lease_expires REAL,
+                               attempts INTEGER NOT NULL DEFAULT 0,
+                               last_error TEXT)""")
+        self.db.execute("CREATE TABLE IF NOT EXISTS flags (name TEXT PRIMARY KEY)")
+
+    def put(self, urls):
+        self.db.executemany("INSERT OR IGNORE INTO tasks (url, state) VALUES (?, ?)", [(url, QUEUED) for url in urls])
+
+    def claim(self, owner, limit):
+        # Queued URLs, and URLs whose worker stopped renewing its lease, go to `owner` for lease_seconds
+        now = time.time()
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            # Expired leases of URLs that have used up their attempts will never be claimed again
+            self.db.execute("UPDATE tasks SET state = ? WHERE state = ? AND lease_expires < ? AND attempts >= ?",
+                            (FAILED, LEASED, now, self.max_attempts))
+            urls = [url for url, in self.db.execute(
+                "SELECT url FROM tasks WHERE state = ? OR (state = ? AND lease_expires < ?) ORDER BY rowid LIMIT ?",
+                (QUEUED, LEASED, now, limit))]
+            self.db.executemany("UPDATE tasks SET state = ?, owner = ?, lease_expires = ?, attempts = attempts + 1 "
+                                "WHERE url = ?", [(LEASED, owner, now + self.lease_seconds, url) for url in urls])
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        return urls
+
+    def heartbeat(self, owner, urls):
+        self.db.executemany("UPDATE tasks SET lease_expires = ? WHERE url = ? AND owner = ? AND state = ?",
+                            [(time.time() + self.lease_seconds, url, owner, LEASED) for url in urls])
+
+    def ack(self, owner, urls):
+        self.db.executemany("UPDATE tasks SET state = ?, lease_expires = NULL WHERE url = ? AND owner = ?",
+                            [(DONE, url, owner) for url in urls])
+
+    def fail(self, owner, url, error):
+        # Back in the queue for another worker, unless the URL has used up its attempts
+        self.db.execute("UPDATE tasks SET state = CASE WHEN attempts < ? THEN ? ELSE ? END, lease_expires = NULL, "
+                        "last_error = ? WHERE url = ? AND owner = ?",
+                        (self.max_attempts, QUEUED, FAILED, error, url, owner))
+
+    def start_crawl(self):
+        # A new crawl: the links the last one finished or gave up on can be queued again, and until the coordinator
+        # calls set_discovered() an empty queue does not mean the crawl is over. Queued and leased links of an
+        # interrupted crawl stay where they are.
+        self.db.execute("BEGIN IMMEDIATE")
+        self.db.execute("DELETE FROM tasks WHERE state IN (?, ?)", (DONE, FAILED))
+        self.db.execute("DELETE FROM flags WHERE name = 'discovered'")
+        self.db.execute("COMMIT")
+
+    def set_discovered(self):
+        self.db.execute("INSERT OR IGNORE INTO flags (name) VALUES ('discovered')")
+
+    def discovered(self):
+        return self.db.execute("SELECT 1 FROM flags WHERE name = 'discovered'").fetchone() is not None
+
+    def counts(self):
+        return dict(self.db.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state").fetchall())
+
+    def close(self):
+        self.db.close()
+
+
+class FileWorkQueue:
+    # Work queue as one small JSON file per URL in queued/, leased/, done/ and failed/ directories.
+    # Claiming is an atomic rename from queued/ to leased/, a lease is the file's mtime, a heartbeat touches it.
+    # Works on any shared directory (NFS, SMB) without a database server.
+    def __init__(self, directory, lease_seconds=QUEUE_LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.directory = directory
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        for state in (QUEUED, LEASED, DONE, FAILED):
+            os.makedirs(os.path.join(directory, state), exist_ok=True)
+
+    def path(self, state, name):
+        return os.path.join(self.directory, state, name)
+
+    def name(self, url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json"
+
+    def read(self, path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def write(self, path, task):
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(task, f)
+        os.replace(path + ".tmp", path)
+
+    def put(self, urls):
+        for url in urls:
+            name = self.name(url)
+            if not any(os.path.exists(self.path(state, name)) for state in (QUEUED, LEASED, DONE, FAILED)):
+                self.write(self.path(QUEUED, name), {"url": url, "attempts": 0})
+
+    def requeue_expired(self):
+        now = time.time()
+        for name in os.listdir(os.path.join(self.directory, LEASED)):
+            path = self.path(LEASED, name)
+            try:
+                if now - os.path.getmtime(path) > self.lease_seconds:
+                    os.rename(path, self.path(QUEUED, name))
+            except FileNotFoundError:
+                # Acked or requeued by someone else in the meantime
+                pass
+
+    def claim(self, owner, limit):
+        self.requeue_expired()
+        urls = []
+        for name in sorted(os.listdir(os.path.join(self.directory, QUEUED))):
+            if len(urls) >= limit:
+                break
+            if name.endswith(".tmp"):
+                continue
+            leased = self.path(LEASED, name)
+            try:
+                os.rename(self.path(QUEUED, name), leased)
+            except FileNotFoundError:
+                # Another worker claimed it first
+                continue
+            task = self.read(leased)
+            task["attempts"] += 1
+            task["owner"] = owner
+            if task["attempts"] > self.max_attempts:
+                os.rename(leased, self.path(FAILED, name))
+                continue
+            self.write(leased, task)
+            urls.append(task["url"])
+        return urls
+
+    def heartbeat(self, owner, urls):
+        for url in urls:
+            try:
+                os.utime(self.path(LEASED, self.name(url)))
+            except FileNotFoundError:
+                pass
+
+    def move(self, url, state, error=None):
+        name = self.name(url)
+        try:
+            if error is not None:
+                task = self.read(self.path(LEASED, name))
+                task["last_error"] = error
+                self.write(self.path(LEASED, name), task)
+            os.rename(self.path(LEASED, name), self.path(state, name))
+        except FileNotFoundError:
+            # The lease expired and the URL went back to the queue
+            pass
+
+    def ack(self, owner, urls):
+        for url in urls:
+            self.move(url, DONE)
+
+    def fail(self, owner, url, error):
+        task_path = self.path(LEASED, self.name(url))
+        attempts = self.read(task_path)["attempts"] if os.path.exists(task_path) else 0
+        self.move(url, QUEUED if attempts < self.max_attempts else FAILED, error)
+
+    def start_crawl(self):
+        path = os.path.join(self.directory, "discovered")
+        if os.path.exists(path):
+            os.remove(path)
+        for state in (DONE, FAILED):
+            for name in os.listdir(os.path.join(self.directory, state)):
+                os.remove(self.path(state, name))
+
+    def set_discovered(self):
+        open(os.path.join(self.directory, "discovered"), "w").close()
+
+    def discovered(self):
+        return os.path.exists(os.path.join(self.directory, "discovered"))
+
+    def counts(self):
+        return {state: sum(not name.endswith(".tmp") for name in os.listdir(os.path.join(self.directory, state)))
+                for state in (QUEUED, LEASED, DONE, FAILED)}
+
+    def close(self):
+        pass
+
+
+def open_queue(path):
+    # A .sqlite/.db file is a SQLite queue, anything else a directory queue
+    if path.endswith((".sqlite", ".db")):
+        return SqliteWorkQueue(path)
+    return FileWorkQueue(path)